@@ -0,0 +1,34 @@
+"""
+Microbenchmarks for django-curation hot paths.
+
+These run against an in-memory SQLite database using the models in the
+``tests`` app. Run the suite and save the results with::
+
+    python -m benchmarks --output before.json
+
+and compare two runs with::
+
+    python -m benchmarks.compare before.json after.json
+
+Individual microbenchmarks can be run directly, e.g.::
+
+    python -m benchmarks.gfk_get
+"""
+import os
+
+
+def setup():
+    """
+    Configure django with the test settings and create the tables for the
+    ``tests`` app in a fresh database.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
+
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0, interactive=False)
+    # Don't time the query logging done by the debug cursor
+    settings.DEBUG = False
@@ -0,0 +1,47 @@
+"""
+Run the benchmark suite and write the results as JSON.
+
+    python -m benchmarks [--sizes 10,100,1000] [--only getattr_proxied,...]
+                         [--repeat 5] [--output results.json]
+"""
+import argparse
+import sys
+
+from . import setup
+
+DEFAULT_SIZES = '10,100,1000,10000,100000'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__.strip())
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+        help='Comma separated group sizes (default: %s)' % DEFAULT_SIZES)
+    parser.add_argument('--only', default=None,
+        help='Comma separated names of the benchmarks to run')
+    parser.add_argument('--repeat', type=int, default=5,
+        help='Number of timed runs of each benchmark (default: 5)')
+    parser.add_argument('--output', default=None,
+        help='File to write the JSON results to (default: stdout)')
+    args = parser.parse_args(argv)
+
+    setup()
+
+    from .suite import dump_results, run_benchmarks
+
+    def log(result):
+        sys.stderr.write('%(name)-24s size=%(size)-7d min=%(min).4fs median=%(median).4fs\n'
+                         % result)
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    names = args.only.split(',') if args.only else None
+    results = run_benchmarks(sizes, names=names, repeat=args.repeat, log=log)
+
+    if args.output:
+        with open(args.output, 'w') as fp:
+            dump_results(results, fp)
+    else:
+        dump_results(results, sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
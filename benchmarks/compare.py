@@ -0,0 +1,52 @@
+"""
+Compare two sets of benchmark results written by ``python -m benchmarks``.
+
+    python -m benchmarks.compare before.json after.json [--threshold 0.10]
+
+Prints the change in the minimum time of each benchmark, and exits with a
+non-zero status if any benchmark is slower by more than ``threshold``.
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path) as fp:
+        data = json.load(fp)
+    return {(r['name'], r['size']): r for r in data['results']}
+
+
+def compare(before, after, threshold):
+    """
+    Return a list of ``(name, size, before_min, after_min, ratio, regressed)``
+    tuples for the benchmarks in both ``before`` and ``after``.
+    """
+    rows = []
+    for key in sorted(set(before) & set(after)):
+        old, new = before[key]['min'], after[key]['min']
+        ratio = new / old if old else float('inf')
+        rows.append(key + (old, new, ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.compare',
+                                     description=__doc__.strip())
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=0.10,
+        help='Allowed slowdown as a fraction (default: 0.10)')
+    args = parser.parse_args(argv)
+
+    rows = compare(load(args.before), load(args.after), args.threshold)
+    regressed = False
+    for name, size, old, new, ratio, is_regression in rows:
+        regressed = regressed or is_regression
+        print('%-24s %7d %10.4fs %10.4fs %+7.1f%%%s' % (
+            name, size, old, new, (ratio - 1) * 100, '  REGRESSION' if is_regression else ''))
+    return 1 if regressed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,287 @@
+"""
+Benchmarks for the curation hot paths, run against the ``tests`` models.
+
+Each benchmark is a function registered with ``@benchmark`` which takes the
+group size, sets up whatever it needs, and returns a ``(func, items)`` tuple:
+``func`` is the callable that gets timed and ``items`` is the number of
+items it processes, used to report a per-item time.
+"""
+import json
+import statistics
+import time
+
+
+#: Registered benchmarks, as (name, func, sizes, max_size) tuples. If sizes
+#: is not None the benchmark runs once at those sizes, whatever sizes were
+#: requested. If max_size is not None the benchmark is skipped for larger
+#: sizes (for benchmarks that run a query per item).
+BENCHMARKS = []
+
+
+def benchmark(name, sizes=None, max_size=None):
+    def decorator(func):
+        BENCHMARKS.append((name, func, sizes, max_size))
+        return func
+    return decorator
+
+
+def populate(size):
+    """
+    Replace the contents of the tests app tables with a curated post group
+    and a set of Handler items, each of ``size`` items. Handlers point at
+    Posts, ModelAs and ModelBs in turn.
+    """
+    from django.contrib.contenttypes.models import ContentType
+    from tests import models
+
+    for model in (models.CuratedPostItem, models.CuratedPostGroup, models.Handler,
+                  models.Post, models.ModelA, models.ModelB):
+        model._base_manager.all().delete()
+
+    posts = models.Post.objects.bulk_create(
+        [models.Post(title='Post %d' % i, body='x' * 1000) for i in range(size)])
+    if not posts or posts[0].pk is None:
+        posts = list(models.Post.objects.order_by('pk'))
+    a_objs = models.ModelA.objects.bulk_create(
+        [models.ModelA(a_field='a%d' % i) for i in range(size // 3 + 1)])
+    b_objs = models.ModelB.objects.bulk_create(
+        [models.ModelB(b_field='b%d' % i) for i in range(size // 3 + 1)])
+    if a_objs[0].pk is None:
+        a_objs = list(models.ModelA.objects.order_by('pk'))
+        b_objs = list(models.ModelB.objects.order_by('pk'))
+
+    group = models.CuratedPostGroup.objects.create(name='Benchmark', slug='benchmark')
+    models.CuratedPostItem.objects.bulk_create([
+        models.CuratedPostItem(post_id=post.pk, group=group, position=i % 32767)
+        for i, post in enumerate(posts)])
+
+    targets = [posts, a_objs, b_objs]
+    handlers = []
+    for i in range(size):
+        obj = targets[i % 3][i // 3]
+        handlers.append(models.Handler(
+            content_type=ContentType.objects.get_for_model(obj),
+            object_id=obj.pk, position=i % 32767))
+    models.Handler.objects.bulk_create(handlers)
+
+
+@benchmark('getattr_proxied')
+def bench_getattr_proxied(size):
+    """CuratedItem.__getattr__ proxied reads, with related objects loaded."""
+    from tests import models
+
+    items = list(models.CuratedPostItem.objects.select_related('post'))
+
+    def run():
+        for item in items:
+            item.title
+    return run, len(items)
+
+
+@benchmark('getattr_miss')
+def bench_getattr_miss(size):
+    """CuratedItem.__getattr__ lookups of names that aren't proxied."""
+    from tests import models
+
+    items = list(models.CuratedPostItem.objects.select_related('post'))
+
+    def run():
+        for item in items:
+            hasattr(item, 'not_an_attribute')
+    return run, len(items)
+
+
+@benchmark('gfk_resolve', max_size=10000)
+def bench_gfk_resolve(size):
+    """Load Handlers and resolve content_object lazily, one query per row."""
+    from tests import models
+
+    def run():
+        for handler in models.Handler.objects.all():
+            handler.content_object
+    return run, size
+
+
+@benchmark('gfk_resolve_prefetch')
+def bench_gfk_resolve_prefetch(size):
+    """Load Handlers with prefetch_related('content_object')."""
+    from tests import models
+
+    def run():
+        for handler in models.Handler.objects.prefetch_related('content_object'):
+            handler.content_object
+    return run, size
+
+
+@benchmark('item_views')
+def bench_item_views(size):
+    """CuratedItemManager.views() over all Handlers."""
+    from tests import models
+
+    def run():
+        for view in models.Handler.objects.views():
+            view.title if view.source == 'post' else view.pk
+    return run, size
+
+
+@benchmark('post_init')
+def bench_post_init(size):
+    """Model instantiation from database rows, including post_init handlers."""
+    from django.db import connection
+    from tests import models
+
+    field_names = [f.attname for f in models.Handler._meta.concrete_fields]
+    rows = list(models.Handler.objects.values_list(*field_names))
+
+    def run():
+        for row in rows:
+            models.Handler.from_db(connection.alias, field_names, row)
+    return run, len(rows)
+
+
+@benchmark('ct_source_choices')
+def bench_ct_source_choices(size):
+    """ContentTypeSourceChoices lookups in both directions."""
+    from tests import models
+
+    ct_choices = models.Handler._meta.get_field('content_type').ct_choices
+    ct_ids = list(models.Handler.objects.values_list('content_type_id', flat=True))
+    sources = list(models.Handler.objects.values_list('source', flat=True))
+
+    def run():
+        for ct_id, source in zip(ct_ids, sources):
+            ct_choices.lookup_source_value(ct_id)
+            ct_choices.lookup_content_type(source)
+    return run, len(ct_ids)
+
+
+@benchmark('source_select_render', sizes=(200,))
+def bench_source_select_render(size):
+    """Render the content_type SourceSelect for each form of a 200-row inline."""
+    from django.forms.models import modelformset_factory
+    from tests import models
+
+    FormSet = modelformset_factory(models.Handler, exclude=['source'], extra=0)
+    queryset = models.Handler.objects.order_by('pk')[:size]
+
+    def run():
+        formset = FormSet(queryset=queryset)
+        for form in formset:
+            str(form['content_type'])
+    return run, size
+
+
+def _staff_request(path, data=None):
+    from django.contrib.auth.models import User
+    from django.test import RequestFactory
+
+    request = RequestFactory().get(path, data)
+    request.user = User(username='benchmark', is_active=True, is_staff=True)
+    return request
+
+
+@benchmark('related_lookup')
+def bench_related_lookup(size):
+    """curation.views.related_lookup for every Handler."""
+    from django.contrib.contenttypes.models import ContentType
+    from curation import views
+    from tests import models
+
+    handler_ct_id = ContentType.objects.get_for_model(models.Handler).pk
+    requests = []
+    for handler in models.Handler.objects.select_related('content_type')[:1000]:
+        requests.append(_staff_request('/', {
+            'app_label': handler.content_type.app_label,
+            'model_name': handler.content_type.model,
+            'object_id': handler.object_id,
+            'ct_field': 'content_type',
+            'fk_field': 'object_id',
+            'ct_id': handler_ct_id,
+        }))
+
+    def run():
+        for request in requests:
+            views.related_lookup(request)
+    return run, len(requests)
+
+
+@benchmark('get_content_types', sizes=(1,))
+def bench_get_content_types(size):
+    """curation.views.get_content_types."""
+    from curation import views
+
+    request = _staff_request('/')
+
+    def run():
+        for i in range(100):
+            views.get_content_types(request)
+    return run, 100
+
+
+def run_benchmarks(sizes, names=None, repeat=5, log=None):
+    """
+    Run the registered benchmarks (or just those in ``names``) at each size
+    in ``sizes`` and return a list of result dicts.
+    """
+    results = []
+    populated = None
+    for size in sizes:
+        for name, func, only_sizes, max_size in BENCHMARKS:
+            if names and name not in names:
+                continue
+            bench_size = size
+            if only_sizes is not None:
+                if size != sizes[0]:
+                    continue
+                bench_size = only_sizes[0]
+            elif max_size is not None and size > max_size:
+                continue
+            if populated != max(bench_size, 1):
+                populated = max(bench_size, 1)
+                populate(populated)
+            run, items = func(bench_size)
+            # Warm up caches (ContentType cache, url resolvers, etc.)
+            run()
+            timings = []
+            for i in range(repeat):
+                start = time.perf_counter()
+                run()
+                timings.append(time.perf_counter() - start)
+            result = {
+                'name': name,
+                'size': bench_size,
+                'items': items,
+                'repeat': repeat,
+                'min': min(timings),
+                'median': statistics.median(timings),
+                'mean': statistics.mean(timings),
+                'per_item': min(timings) / items if items else None,
+            }
+            results.append(result)
+            if log is not None:
+                log(result)
+    return results
+
+
+def get_metadata():
+    import platform
+    import subprocess
+
+    import django
+
+    try:
+        revision = subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'revision': revision,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+
+
+def dump_results(results, fp):
+    json.dump({'metadata': get_metadata(), 'results': results}, fp, indent=2)
+    fp.write('\n')
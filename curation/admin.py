@@ -0,0 +1,332 @@
+"""
+ModelAdmin and InlineModelAdmin base classes for CuratedItem models, which
+load the related objects of the items' curated field with the items, share
+the choices of the items' select fields across all the forms of a formset,
+and save only the changes to the items in bulk, so that the number of
+queries an admin page runs doesn't grow with the number of items::
+
+    from curation.admin import CuratedItemInline
+
+    class CuratedPostInline(CuratedItemInline):
+        model = CuratedPost
+
+    @admin.register(CuratedPostGroup)
+    class CuratedPostGroupAdmin(admin.ModelAdmin):
+        inlines = [CuratedPostInline]
+"""
+from django.contrib import admin
+from django.core.exceptions import ValidationError
+from django.db import connections, router, transaction
+from django.db.models import F
+from django.forms.fields import IntegerField
+from django.forms.models import BaseInlineFormSet, BaseModelFormSet, ModelChoiceField
+from django.forms.widgets import HiddenInput, Select
+
+from . import counters
+from .cache import invalidate_group_version
+from .models import CuratedGroup, CuratedGroupVersion
+from .prefetch import with_curated_targets
+
+
+#: The name of the hidden management form field holding the version of the
+#: group an inline formset of its items was rendered with
+GROUP_VERSION = 'GROUP_VERSION'
+
+
+def get_field_values(obj):
+    return dict((f.attname, getattr(obj, f.attname))
+                for f in obj._meta.concrete_fields if not f.primary_key)
+
+
+def can_return_rows_from_bulk_insert(using):
+    features = connections[using].features
+    return getattr(features, 'can_return_rows_from_bulk_insert',
+                   getattr(features, 'can_return_ids_from_bulk_insert', False))
+
+
+class CuratedItemFormSetMixin(object):
+    """
+    Evaluates the choices of each select field (e.g. the queryset of a
+    ModelChoiceField for a ForeignKey) once per formset rather than once per
+    form, and gives every form the same list of choices.
+
+    Saves (with commit=True) by comparing each submitted item to the values
+    it had when loaded, and writing only the fields that actually changed:
+    with one bulk_update() for the changed items (e.g. the positions of a
+    reordered group), one DELETE for the deleted items, and one
+    bulk_create() for the new items, on databases that return the pks of
+    bulk inserted rows. As with bulk_update() and bulk_create(), the items'
+    save() methods aren't called, and pre_save / post_save aren't sent.
+    Forms with many-to-many fields are saved individually.
+
+    Inline formsets of the items of a CuratedGroup with CuratedGroupVersion
+    also detect concurrent edits: the version of the group is rendered in the
+    management form, and the formset fails validation if the group's version
+    has changed since, and raises VersionConflict from save() if it changed
+    after validation.
+    """
+
+    def _construct_form(self, i, **kwargs):
+        form = super(CuratedItemFormSetMixin, self)._construct_form(i, **kwargs)
+        self.share_choices(form)
+        if form.instance.pk is not None:
+            # The values to compare the submitted values to, before they are
+            # assigned to the instance during validation
+            form.stored_values = get_field_values(form.instance)
+        return form
+
+    @property
+    def empty_form(self):
+        form = super(CuratedItemFormSetMixin, self).empty_form
+        self.share_choices(form)
+        return form
+
+    def share_choices(self, form):
+        shared_choices = self.__dict__.setdefault('_shared_choices', {})
+        for name, field in form.fields.items():
+            # Unwrap admin widgets (e.g. RelatedFieldWidgetWrapper), and skip
+            # widgets that don't render choices, such as raw id inputs
+            widget = getattr(field.widget, 'widget', field.widget)
+            if not isinstance(field, ModelChoiceField) or not isinstance(widget, Select):
+                continue
+            try:
+                choices = shared_choices[name]
+            except KeyError:
+                # Not list(), which would run a COUNT query for len()
+                choices = shared_choices[name] = [choice for choice in field.choices]
+            widget.choices = choices
+
+    @property
+    def management_form(self):
+        form = super(CuratedItemFormSetMixin, self).management_form
+        group = self.get_versioned_group()
+        if group is not None:
+            form.fields[GROUP_VERSION] = IntegerField(widget=HiddenInput)
+            form.initial[GROUP_VERSION] = group.version
+        return form
+
+    def get_group(self):
+        """
+        Return the CuratedGroup the items of an inline formset belong to, or
+        None.
+        """
+        group = getattr(self, 'instance', None)
+        if isinstance(group, CuratedGroup) and group.pk is not None:
+            return group
+        return None
+
+    def get_versioned_group(self):
+        """
+        Return the group the items of an inline formset belong to, if it
+        includes CuratedGroupVersion, or None.
+        """
+        group = self.get_group()
+        if isinstance(group, CuratedGroupVersion):
+            return group
+        return None
+
+    def get_expected_group_version(self):
+        """
+        Return the version of the group that the submitted formset was
+        rendered with, or None.
+        """
+        try:
+            return int(self.data['%s-%s' % (self.prefix, GROUP_VERSION)])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def clean(self):
+        super(CuratedItemFormSetMixin, self).clean()
+        group = self.get_versioned_group()
+        expected = self.get_expected_group_version()
+        if group is not None and expected is not None and expected != group.version:
+            raise ValidationError(
+                "This group was changed by someone else while you were editing "
+                "it. Reload the page to see their changes.", code='version_conflict')
+
+    def save(self, commit=True):
+        """
+        With commit=True, check and bump the version of the group (if it has
+        one) in the same transaction as the writes to its items, raising
+        VersionConflict if the group changed after the formset was rendered,
+        and refresh the counters of the groups the items were saved to, if
+        they have counters. Formsets that aren't for the items of one group,
+        such as the admin changelist's, bump the versions of all the groups
+        the items were saved to.
+        """
+        group = self.get_group()
+        versioned_group = self.get_versioned_group()
+        bump_saved_groups = group is None and self.model.group_has_version()
+        has_counters = self.model.group_has_counters()
+        if not commit or not (versioned_group or bump_saved_groups or has_counters):
+            return super(CuratedItemFormSetMixin, self).save(commit)
+        if group is not None:
+            using = group._state.db
+        else:
+            using = router.db_for_write(self.model)
+        with transaction.atomic(using=using, savepoint=False):
+            if versioned_group is not None:
+                expected = self.get_expected_group_version()
+                if expected is None:
+                    expected = group.version
+                # Other formsets for the same group (e.g. inlines of different
+                # item models) share the group instance and its bump
+                if group.__dict__.get('_bumped_version') != expected:
+                    group.bump_version(expected=expected)
+                    group.__dict__['_bumped_version'] = expected
+            saved = super(CuratedItemFormSetMixin, self).save(commit)
+            group_ids = self.get_saved_group_ids()
+            if bump_saved_groups:
+                self.bump_group_versions(group_ids, using)
+            if has_counters:
+                counters.refresh_item_groups(self.model, group_ids, using=using)
+            return saved
+
+    def get_saved_group_ids(self):
+        """
+        Return the ids of the groups that the items saved by save() were in,
+        before or after saving.
+        """
+        attname = self.model.get_group_field().attname
+        group = self.get_group()
+        group_ids = set() if group is None else set([group.pk])
+        for form in self.initial_forms:
+            stored_values = getattr(form, 'stored_values', None)
+            if stored_values is None:
+                continue
+            if form in self.deleted_forms or form.has_changed():
+                group_ids.add(stored_values.get(attname))
+        changed = [obj for obj, changed_data in self.changed_objects]
+        group_ids.update(getattr(obj, attname) for obj in changed + self.new_objects)
+        group_ids.discard(None)
+        return group_ids
+
+    def bump_group_versions(self, group_ids, using):
+        """
+        Increment the versions of the groups with ids ``group_ids``, whose
+        items were written in bulk by save().
+        """
+        if not group_ids:
+            return
+        group_model = self.model.get_group_field().related_model
+        group_model._base_manager.using(using).filter(pk__in=group_ids).update(
+            version=F('version') + 1)
+        for group_id in group_ids:
+            invalidate_group_version(group_model, group_id, using)
+
+    def save_existing(self, form, instance, commit=True):
+        if commit and self.get_group() is not None:
+            instance.__dict__['_skip_group_update'] = True
+        return super(CuratedItemFormSetMixin, self).save_existing(form, instance, commit)
+
+    def save_new(self, form, commit=True):
+        if commit and self.get_group() is not None:
+            form.instance.__dict__['_skip_group_update'] = True
+        return super(CuratedItemFormSetMixin, self).save_new(form, commit)
+
+    def has_m2m_fields(self, form):
+        return any(f.name in form.fields for f in form._meta.model._meta.many_to_many)
+
+    def get_changed_fields(self, form):
+        """
+        Return the names of the concrete fields of ``form.instance`` whose
+        values differ from the values it was loaded with, or None if the form
+        has to be saved individually.
+        """
+        stored_values = getattr(form, 'stored_values', None)
+        if stored_values is None or self.has_m2m_fields(form):
+            return None
+        obj = form.instance
+        return [f.name for f in obj._meta.concrete_fields if f.attname in stored_values
+                if getattr(obj, f.attname) != stored_values[f.attname]]
+
+    def save_existing_objects(self, commit=True):
+        if not commit:
+            return super(CuratedItemFormSetMixin, self).save_existing_objects(commit)
+        self.changed_objects = []
+        self.deleted_objects = []
+        saved_instances = []
+        updated_objs = []
+        update_fields = set()
+        for form in self.initial_forms:
+            obj = form.instance
+            if obj.pk is None:
+                continue
+            if form in self.deleted_forms:
+                self.deleted_objects.append(obj)
+                continue
+            if not form.has_changed():
+                continue
+            changed_fields = self.get_changed_fields(form)
+            if changed_fields is None:
+                obj = self.save_existing(form, obj)
+            elif changed_fields:
+                updated_objs.append(obj)
+                update_fields.update(changed_fields)
+            self.changed_objects.append((obj, form.changed_data))
+            saved_instances.append(obj)
+
+        if self.deleted_objects:
+            using = self.deleted_objects[0]._state.db
+            self.model._base_manager.using(using).filter(
+                pk__in=[obj.pk for obj in self.deleted_objects]).delete()
+        if updated_objs:
+            using = updated_objs[0]._state.db
+            self.model._base_manager.using(using).bulk_update(
+                updated_objs, sorted(update_fields))
+        return saved_instances
+
+    def save_new_objects(self, commit=True):
+        using = router.db_for_write(self.model)
+        if not commit or not can_return_rows_from_bulk_insert(using):
+            return super(CuratedItemFormSetMixin, self).save_new_objects(commit)
+        self.new_objects = []
+        created_objs = []
+        for form in self.extra_forms:
+            if not form.has_changed():
+                continue
+            if self.can_delete and self._should_delete_form(form):
+                continue
+            if self.has_m2m_fields(form):
+                self.new_objects.append(self.save_new(form, commit=True))
+            else:
+                created_objs.append(self.save_new(form, commit=False))
+        if created_objs:
+            self.model._base_manager.using(using).bulk_create(created_objs)
+            self.new_objects.extend(created_objs)
+        return self.new_objects
+
+
+class CuratedItemInlineFormSet(CuratedItemFormSetMixin, BaseInlineFormSet):
+    pass
+
+
+class CuratedItemModelFormSet(CuratedItemFormSetMixin, BaseModelFormSet):
+    pass
+
+
+class CuratedItemAdminMixin(object):
+    """
+    Loads the related objects of the curated field with the items (see
+    curation.prefetch.with_curated_targets()), so that item labels and
+    proxied attributes don't run a query per item.
+    """
+
+    def get_queryset(self, request):
+        return with_curated_targets(
+            super(CuratedItemAdminMixin, self).get_queryset(request))
+
+
+class CuratedItemInline(CuratedItemAdminMixin, admin.TabularInline):
+    formset = CuratedItemInlineFormSet
+
+
+class CuratedItemStackedInline(CuratedItemAdminMixin, admin.StackedInline):
+    formset = CuratedItemInlineFormSet
+
+
+class CuratedItemAdmin(CuratedItemAdminMixin, admin.ModelAdmin):
+
+    def get_changelist_formset(self, request, **kwargs):
+        kwargs.setdefault('formset', CuratedItemModelFormSet)
+        return super(CuratedItemAdmin, self).get_changelist_formset(request, **kwargs)
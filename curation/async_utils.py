@@ -0,0 +1,27 @@
+"""
+Helpers for running ORM queries from async code. These use the async
+queryset methods (``aget()``, ``async for``) on versions of Django that have
+them (4.1+), and otherwise run the query in a thread with sync_to_async().
+
+Requires Django 3.1 or later.
+"""
+from asgiref.sync import sync_to_async
+
+from django.db.models import QuerySet
+
+
+HAS_ASYNC_ORM = hasattr(QuerySet, 'aget')
+
+
+async def aget(queryset, *args, **kwargs):
+    """Async equivalent of ``queryset.get(*args, **kwargs)``."""
+    if HAS_ASYNC_ORM:
+        return await queryset.aget(*args, **kwargs)
+    return await sync_to_async(queryset.get)(*args, **kwargs)
+
+
+async def alist(queryset):
+    """Async equivalent of ``list(queryset)``."""
+    if HAS_ASYNC_ORM:
+        return [obj async for obj in queryset]
+    return await sync_to_async(list)(queryset)
@@ -1,5 +1,6 @@
 from warnings import warn
 
+from django.core.exceptions import FieldDoesNotExist
 from django.db.models.base import ModelBase
 
 
@@ -35,4 +36,32 @@ class CuratedItemModelBase(ModelBase):
             raise TypeError("Model %r has no CuratedForeignKey fields. All "
                             "subclasses of CuratedItem must define exactly "
                             "one CuratedForeignKey field." % model_cls._meta.object_name)
+
+        if model_cls.cache_proxied_values:
+            model_cls._meta._proxied_value_dependencies = cls.get_proxied_value_dependencies(
+                model_cls)
+            model_cls.__setattr__ = CuratedItem._setattr_clearing_proxied_values
         return model_cls
+
+    @staticmethod
+    def get_proxied_value_dependencies(model_cls):
+        """
+        Return the set of attribute names which, when assigned on an instance
+        of ``model_cls``, clear its memo of proxied values: the curated field,
+        its content type and object id fields, and the field_overrides fields.
+        """
+        opts = model_cls._meta
+        curated_field = opts.get_field(opts._curated_proxy_field_name)
+        names = {curated_field.name}
+        if opts._curated_field_is_generic:
+            ct_field = opts.get_field(curated_field.ct_field)
+            names.update([ct_field.name, ct_field.attname, curated_field.fk_field])
+        else:
+            names.add(curated_field.attname)
+        for field_name in model_cls.field_overrides.values():
+            names.add(field_name)
+            try:
+                names.add(opts.get_field(field_name).attname)
+            except FieldDoesNotExist:
+                pass
+        return frozenset(names)
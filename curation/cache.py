@@ -0,0 +1,226 @@
+"""
+Caching of curated group reads, keyed on the group's ``version`` so that a
+cache hit runs no queries and a write to the group is seen by the next read.
+
+The version of each group is cached under its pk (with the slug it was read
+by, which is checked on reads, and the pk under the slug). When the
+transaction that bumps it commits (in item save() and delete(),
+CuratedGroup.bump_version() and the group's own save() and delete()), the
+new version is read from the database and set in the cache. Reads that
+miss only add() the version they read, so that a read that started before
+the commit can't overwrite the new version with the old one. Writes that
+don't bump the version (queryset update() / delete(), bulk_create(),
+database cascades) aren't seen until the entries expire, or the group's
+version is bumped.
+
+The cached items of a group are stored with the version they were loaded
+at. By default, a read after the version changes reloads them. With the
+``CURATION_CACHE_SOFT_TIMEOUT`` setting (in seconds), reads are
+stale-while-revalidate instead: when the entry is older than the soft timeout
+or than the group's version, the first caller to take a lock in the cache
+(held for at most ``CURATION_CACHE_LOCK_TIMEOUT`` seconds, default 30)
+reloads the items, while other callers keep getting the stale items, so a
+write to a hot group doesn't make every worker reload it at once. Entries
+are dropped, and reloaded by every caller that misses, after the hard
+``CURATION_CACHE_TIMEOUT``.
+
+Group models must include CuratedGroupVersion to be read through the
+cache.
+
+The cache and hard timeout are set with the ``CURATION_CACHE`` (a key of
+``CACHES``, default ``'default'``) and ``CURATION_CACHE_TIMEOUT`` (in
+seconds, default 300) settings.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+
+def get_cache():
+    return caches[getattr(settings, 'CURATION_CACHE', 'default')]
+
+
+def get_timeout():
+    return getattr(settings, 'CURATION_CACHE_TIMEOUT', 300)
+
+
+def get_soft_timeout():
+    return getattr(settings, 'CURATION_CACHE_SOFT_TIMEOUT', None)
+
+
+def get_lock_timeout():
+    return getattr(settings, 'CURATION_CACHE_LOCK_TIMEOUT', 30)
+
+
+def has_version(group_model):
+    from .models import CuratedGroupVersion
+    return group_model is not None and issubclass(group_model, CuratedGroupVersion)
+
+
+def _hash(value):
+    return hashlib.md5(value.encode('utf-8')).hexdigest()
+
+
+def group_pk_key(group_model, slug, using=DEFAULT_DB_ALIAS):
+    return 'curation.group_pk:%s:%s:%s' % (using, group_model._meta.label_lower, _hash(slug))
+
+
+def group_version_key(group_model, pk, using=DEFAULT_DB_ALIAS):
+    return 'curation.group_version:%s:%s:%s' % (using, group_model._meta.label_lower, pk)
+
+
+def group_items_key(item_model, group_pk, using=DEFAULT_DB_ALIAS):
+    return 'curation.group_items:%s:%s:%s' % (using, item_model._meta.label_lower, group_pk)
+
+
+def get_group_pk_version(group_model, slug, using=None):
+    """
+    Return the ``(pk, version)`` of the group of ``group_model`` with slug
+    ``slug``, or None if it doesn't exist, from the cache if possible.
+    """
+    if not has_version(group_model):
+        raise ImproperlyConfigured(
+            "%s must include CuratedGroupVersion to be cached" % group_model._meta.label)
+    using = using or DEFAULT_DB_ALIAS
+    cache = get_cache()
+    pk = cache.get(group_pk_key(group_model, slug, using))
+    if pk is not None:
+        cached = cache.get(group_version_key(group_model, pk, using))
+        if cached is not None and cached[0] == slug:
+            return pk, cached[1]
+    row = group_model._base_manager.using(using).filter(
+        slug=slug).values_list('pk', 'version').first()
+    if row is None:
+        return None
+    pk, version = row
+    # Not set(), which could replace the version set by a write that
+    # committed after the row was read
+    cache.add(group_pk_key(group_model, slug, using), pk, get_timeout())
+    cache.add(group_version_key(group_model, pk, using), (slug, version), get_timeout())
+    return row
+
+
+def get_group_version(group_model, slug, using=None):
+    """
+    Return the version of the group of ``group_model`` with slug ``slug``,
+    or None if it doesn't exist, from the cache if possible.
+    """
+    row = get_group_pk_version(group_model, slug, using)
+    return None if row is None else row[1]
+
+
+def refresh_group_version(group_model, pk, using=None):
+    """
+    Set the cached version of the group of ``group_model`` with pk ``pk`` to
+    its version in the database, or delete it if the group doesn't exist.
+    """
+    using = using or DEFAULT_DB_ALIAS
+    key = group_version_key(group_model, pk, using)
+    row = group_model._base_manager.using(using).filter(
+        pk=pk).values_list('slug', 'version').first()
+    if row is None:
+        get_cache().delete(key)
+    else:
+        get_cache().set(key, row, get_timeout())
+
+
+def invalidate_group_version(group_model, pk, using=None):
+    """
+    Refresh the cached version of the group of ``group_model`` with pk
+    ``pk`` when the current transaction on ``using`` commits (or now, in
+    autocommit mode).
+    """
+    using = using or DEFAULT_DB_ALIAS
+    transaction.on_commit(
+        lambda: refresh_group_version(group_model, pk, using), using=using)
+
+
+def load_group_items(item_model, slug, using=None):
+    """
+    Return a list of the items of ``item_model`` in the group with slug
+    ``slug``, with the related objects of their curated field loaded with
+    one query per related model.
+    """
+    from .models import CuratedItemQuerySet
+    queryset = CuratedItemQuerySet(item_model, using=using).group(slug)
+    return list(queryset.resolved())
+
+
+def build_group_entry(item_model, slug, version, using=None):
+    """
+    Load the items of the group and return the cache entry for them:
+    ``(version, soft_expires, items)``, where ``soft_expires`` is the time
+    after which the entry is stale, or None if stale-while-revalidate is off.
+    """
+    soft_timeout = get_soft_timeout()
+    soft_expires = None if soft_timeout is None else time.time() + soft_timeout
+    return (version, soft_expires, load_group_items(item_model, slug, using))
+
+
+def get_group_entry(item_model, slug, using=None):
+    """
+    Return ``(version, items)`` for the items of ``item_model`` in the group
+    with slug ``slug``, from the cache if possible, or None if the group
+    doesn't exist. ``version`` is the version of the group the items were
+    loaded at, which is older than the current version if stale items were
+    returned while another caller rebuilds them.
+    """
+    using = using or DEFAULT_DB_ALIAS
+    group_model = item_model.get_group_field().related_model
+    row = get_group_pk_version(group_model, slug, using)
+    if row is None:
+        return None
+    pk, version = row
+    cache = get_cache()
+    key = group_items_key(item_model, pk, using)
+    entry = cache.get(key)
+    if entry is not None:
+        entry_version, soft_expires, items = entry
+        if entry_version >= version and (soft_expires is None or soft_expires > time.time()):
+            return entry_version, items
+        if soft_expires is not None:
+            lock_key = key + ':lock'
+            if not cache.add(lock_key, True, get_lock_timeout()):
+                # Another caller is rebuilding the entry
+                return entry_version, items
+            try:
+                entry = build_group_entry(item_model, slug, version, using)
+                cache.set(key, entry, get_timeout())
+            finally:
+                cache.delete(lock_key)
+            return version, entry[2]
+    entry = build_group_entry(item_model, slug, version, using)
+    cache.set(key, entry, get_timeout())
+    return version, entry[2]
+
+
+def warm_group(item_model, slug, using=None):
+    """
+    Load the items of ``item_model`` in the group with slug ``slug`` and
+    store them, and the group's version, in the cache, whether or not they
+    are cached already. Returns the number of items, or None if the group
+    doesn't exist.
+    """
+    using = using or DEFAULT_DB_ALIAS
+    group_model = item_model.get_group_field().related_model
+    get_cache().delete(group_pk_key(group_model, slug, using))
+    row = get_group_pk_version(group_model, slug, using)
+    if row is None:
+        return None
+    entry = build_group_entry(item_model, slug, row[1], using)
+    get_cache().set(group_items_key(item_model, row[0], using), entry, get_timeout())
+    return len(entry[2])
+
+
+def get_group_items(item_model, slug, using=None):
+    """
+    Return the items of ``item_model`` in the group with slug ``slug``, as
+    returned by load_group_items(), from the cache if possible (see
+    get_group_entry()). Returns an empty list if the group doesn't exist.
+    """
+    entry = get_group_entry(item_model, slug, using)
+    return [] if entry is None else entry[1]
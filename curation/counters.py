@@ -0,0 +1,188 @@
+"""
+Maintenance of the denormalized ``item_count`` and ``max_position`` columns
+of CuratedGroup models that include CuratedGroupCounters.
+
+Item save() and delete() adjust the counters of the item's group in one
+UPDATE, which also bumps its version if it includes CuratedGroupVersion. The
+curated admin formsets, and the bulk
+deletes done by ``on_target_delete`` and ``delete_dangling_items()``,
+recompute the counters of the groups they touched with refresh_counters().
+Other writes to the items (queryset update() / delete(), bulk_create(),
+database cascades when a group's related objects are deleted) don't
+maintain them; run the ``repair_curated_counters`` management command, or
+refresh_counters(), after those.
+"""
+from functools import reduce
+
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Count, F, IntegerField, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest, NullIf
+
+
+def has_counters(group_model):
+    from .models import CuratedGroupCounters
+    return group_model is not None and issubclass(group_model, CuratedGroupCounters)
+
+
+def get_item_models(group_model):
+    """
+    Return the CuratedItem models whose ``group`` ForeignKey points to
+    ``group_model``, whose items the group's counters count.
+    """
+    from .models import CuratedItem
+    item_rels = [rel for rel in group_model._meta.related_objects
+                 if issubclass(rel.related_model, CuratedItem)]
+    return [rel.related_model for rel in item_rels
+            if rel.related_model.get_group_field() is rel.field]
+
+
+def _aggregate_subquery(item_model, aggregate):
+    field = item_model.get_group_field()
+    return Subquery(
+        item_model._base_manager.filter(**{field.attname: OuterRef('pk')})
+        .order_by().values(field.attname)
+        .annotate(value=aggregate).values('value'),
+        output_field=IntegerField())
+
+
+def item_count_expression(group_model):
+    """
+    Return an expression computing the number of items of a group, for use
+    in an update() or annotate() of ``group_model``.
+    """
+    counts = [Coalesce(_aggregate_subquery(item_model, Count('pk')), Value(0))
+              for item_model in get_item_models(group_model)]
+    if not counts:
+        return Value(0)
+    return reduce(lambda a, b: a + b, counts)
+
+
+def max_position_expression(group_model):
+    """
+    Return an expression computing the largest position of the items of a
+    group (NULL for an empty group), for use in an update() or annotate() of
+    ``group_model``.
+    """
+    maxes = [_aggregate_subquery(item_model, Max('position'))
+             for item_model in get_item_models(group_model)]
+    if not maxes:
+        return Value(None, output_field=IntegerField())
+    if len(maxes) == 1:
+        return maxes[0]
+    # Positions aren't negative, so -1 stands in for "no items" in GREATEST(),
+    # which is NULL if any argument is NULL on some databases
+    return NullIf(Greatest(*[Coalesce(m, Value(-1)) for m in maxes]), Value(-1))
+
+
+def added_item_updates(position):
+    """Return the update() kwargs for a group that gained an item at ``position``."""
+    return {
+        'item_count': F('item_count') + 1,
+        'max_position': Greatest(Coalesce(F('max_position'), Value(position)), Value(position)),
+    }
+
+
+def removed_item_updates(group_model):
+    """Return the update() kwargs for a group that lost an item."""
+    return {
+        'item_count': F('item_count') - 1,
+        'max_position': max_position_expression(group_model),
+    }
+
+
+def moved_item_updates(group_model, old_position, position):
+    """
+    Return the update() kwargs for a group one of whose items moved from
+    ``old_position`` to ``position``.
+    """
+    if position >= old_position:
+        return {'max_position': Greatest(
+            Coalesce(F('max_position'), Value(position)), Value(position))}
+    return {'max_position': max_position_expression(group_model)}
+
+
+def recount_updates(group_model):
+    return {
+        'item_count': item_count_expression(group_model),
+        'max_position': max_position_expression(group_model),
+    }
+
+
+def refresh_counters(group_model, pks=None, using=DEFAULT_DB_ALIAS):
+    """
+    Recompute the counters of the groups of ``group_model`` with pks in
+    ``pks`` (or of all groups, if None) from their items, with one UPDATE.
+    Returns the number of groups updated.
+    """
+    if not has_counters(group_model):
+        return 0
+    queryset = group_model._base_manager.using(using)
+    if pks is not None:
+        pks = set(pk for pk in pks if pk is not None)
+        if not pks:
+            return 0
+        queryset = queryset.filter(pk__in=pks)
+    return queryset.update(**recount_updates(group_model))
+
+
+def get_group_pk_ranges(group_model, chunk_size, using=DEFAULT_DB_ALIAS):
+    """
+    Yield ``(first_pk, last_pk)`` ranges of at most ``chunk_size`` groups of
+    ``group_model``, covering all of its groups.
+    """
+    from .dangling import _pages
+    queryset = group_model._base_manager.using(using).values_list('pk')
+    for rows in _pages(queryset, chunk_size):
+        yield rows[0][0], rows[-1][0]
+
+
+def recount_group_range(group_model, first_pk, last_pk, using=DEFAULT_DB_ALIAS):
+    """
+    Recompute the counters of the groups of ``group_model`` with pks from
+    ``first_pk`` to ``last_pk``, with one grouped aggregate query per item
+    model over that range of the group index, and write them with
+    bulk_update(). Returns the number of groups updated.
+    """
+    counters = dict(
+        (pk, [0, None]) for pk in group_model._base_manager.using(using).filter(
+            pk__gte=first_pk, pk__lte=last_pk).values_list('pk', flat=True))
+    for item_model in get_item_models(group_model):
+        attname = item_model.get_group_field().attname
+        rows = item_model._base_manager.using(using).filter(**{
+            '%s__gte' % attname: first_pk,
+            '%s__lte' % attname: last_pk,
+        }).order_by().values(attname).annotate(
+            item_count=Count('pk'), max_position=Max('position'),
+        ).values_list(attname, 'item_count', 'max_position')
+        for pk, item_count, max_position in rows:
+            if pk not in counters:
+                continue
+            group_counters = counters[pk]
+            group_counters[0] += item_count
+            if group_counters[1] is None or max_position > group_counters[1]:
+                group_counters[1] = max_position
+    groups = [group_model(pk=pk, item_count=item_count, max_position=max_position)
+              for pk, (item_count, max_position) in counters.items()]
+    group_model._base_manager.using(using).bulk_update(groups, ['item_count', 'max_position'])
+    return len(groups)
+
+
+def get_counted_group_ids(queryset):
+    """
+    Return the set of the group ids of the items in ``queryset``, if their
+    groups have counters, or None, so that the counters can be refreshed
+    after the items are deleted or updated in bulk.
+    """
+    field = queryset.model.get_group_field()
+    if field is None or not has_counters(field.related_model):
+        return None
+    return set(queryset.order_by().values_list(field.attname, flat=True).distinct())
+
+
+def refresh_item_groups(item_model, group_ids, using=DEFAULT_DB_ALIAS):
+    """
+    Refresh the counters of the groups with ids ``group_ids`` (as returned
+    by get_counted_group_ids()) of items of ``item_model``.
+    """
+    if group_ids:
+        refresh_counters(item_model.get_group_field().related_model, group_ids, using=using)
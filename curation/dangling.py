@@ -0,0 +1,136 @@
+"""
+Finding and deleting curated items whose CuratedGenericForeignKey points to
+an object that no longer exists.
+
+Items are checked without loading model instances, grouped by content type:
+when the items and their related objects are in the same database, with one
+anti-join (``NOT EXISTS``) query per content type per batch of items, and
+otherwise with one ``pk__in`` query per content type per batch::
+
+    from curation.dangling import find_dangling_items, delete_dangling_items
+
+    for content_type, pks in find_dangling_items(Handler):
+        print(content_type, pks)
+
+    delete_dangling_items(Handler, batch_size=5000)
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Exists, OuterRef
+
+from . import counters
+from .prefetch import _batches
+
+
+#: Internal types of fields which can be compared to each other in SQL
+_integer_types = {
+    'AutoField', 'BigAutoField', 'SmallAutoField', 'IntegerField',
+    'BigIntegerField', 'SmallIntegerField', 'PositiveIntegerField',
+    'PositiveSmallIntegerField', 'PositiveBigIntegerField',
+}
+
+
+def get_curated_generic_field(model_cls):
+    opts = model_cls._meta
+    if not getattr(opts, '_curated_field_is_generic', False):
+        raise ValueError("%s.%s does not have a CuratedGenericForeignKey" % (
+            opts.app_label, opts.object_name))
+    return opts.get_field(opts._curated_proxy_field_name)
+
+
+def _can_anti_join(fk_field, target_cls):
+    fk_type = fk_field.get_internal_type()
+    pk_field = target_cls._meta.pk
+    if pk_field.remote_field:
+        pk_field = pk_field.target_field
+    pk_type = pk_field.get_internal_type()
+    return fk_type == pk_type or (fk_type in _integer_types and pk_type in _integer_types)
+
+
+def _pages(queryset, batch_size):
+    """
+    Yield lists of at most ``batch_size`` rows of ``queryset``, a values_list()
+    queryset whose first column is the pk, paginating on the pk so that rows
+    deleted between pages don't shift the pages.
+    """
+    queryset = queryset.order_by('pk')
+    last_pk = None
+    while True:
+        page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(page[:batch_size])
+        if not rows:
+            return
+        yield rows
+        last_pk = rows[-1][0]
+
+
+def _iter_dangling_pks_anti_join(items, fk_attname, target_qs, batch_size):
+    items = items.annotate(
+        _has_target=Exists(target_qs.filter(pk=OuterRef(fk_attname)))
+    ).filter(_has_target=False)
+    for rows in _pages(items.values_list('pk'), batch_size):
+        yield [pk for pk, in rows]
+
+
+def _iter_dangling_pks_in_batches(items, fk_attname, target_qs, batch_size):
+    to_python = target_qs.model._meta.pk.to_python
+    for rows in _pages(items.values_list('pk', fk_attname), batch_size):
+        fk_values = set(to_python(fk_val) for _, fk_val in rows)
+        existing = set()
+        for batch in _batches(fk_values, target_qs.db):
+            existing.update(target_qs.filter(pk__in=batch).values_list('pk', flat=True))
+        pks = [pk for pk, fk_val in rows if to_python(fk_val) not in existing]
+        if pks:
+            yield pks
+
+
+def find_dangling_items(model_cls, using=DEFAULT_DB_ALIAS, batch_size=1000):
+    """
+    Yield ``(content_type, pks)`` tuples, where ``pks`` is a list of at most
+    ``batch_size`` primary keys of ``model_cls`` items in database ``using``
+    whose CuratedGenericForeignKey points to a ``content_type`` object that
+    doesn't exist. Items with a content type whose model no longer exists
+    are also dangling.
+    """
+    field = get_curated_generic_field(model_cls)
+    fk_field = model_cls._meta.get_field(field.fk_field)
+    queryset = model_cls._base_manager.using(using)
+    ct_ids = (queryset.order_by().exclude(**{field.ct_attname: None})
+              .values_list(field.ct_attname, flat=True).distinct())
+    ct_manager = ContentType.objects.db_manager(using)
+    for ct_id in list(ct_ids):
+        items = queryset.filter(**{field.ct_attname: ct_id})
+        try:
+            ct = ct_manager.get_for_id(ct_id)
+        except ContentType.DoesNotExist:
+            ct = None
+        target_cls = ct and ct.model_class()
+        if target_cls is None:
+            for rows in _pages(items.values_list('pk'), batch_size):
+                yield ct, [pk for pk, in rows]
+            continue
+        target_qs = target_cls._base_manager.using(ct._state.db)
+        if target_qs.db == using and _can_anti_join(fk_field, target_cls):
+            pk_batches = _iter_dangling_pks_anti_join(
+                items, fk_field.attname, target_qs, batch_size)
+        else:
+            pk_batches = _iter_dangling_pks_in_batches(
+                items, fk_field.attname, target_qs, batch_size)
+        for pks in pk_batches:
+            yield ct, pks
+
+
+def delete_dangling_items(model_cls, using=DEFAULT_DB_ALIAS, batch_size=1000):
+    """
+    Delete the items found by find_dangling_items() in batches of at most
+    ``batch_size``, and return the number of items deleted.
+    """
+    deleted = 0
+    queryset = model_cls._base_manager.using(using)
+    label = model_cls._meta.concrete_model._meta.label
+    for _, pks in find_dangling_items(model_cls, using=using, batch_size=batch_size):
+        items = queryset.filter(pk__in=pks)
+        group_ids = counters.get_counted_group_ids(items)
+        deleted += items.delete()[1].get(label, 0)
+        counters.refresh_item_groups(model_cls, group_ids, using=using)
+    return deleted
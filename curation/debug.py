@@ -0,0 +1,151 @@
+"""
+Opt-in detection of N+1 queries caused by lazily loading the related objects
+of curated items, e.g. a template that loops over a curated group and reads a
+proxied attribute of each item without the group having been loaded with
+``select_related()`` / ``prefetch_related()``.
+
+When enabled, each model instance loaded by a CuratedItemQuerySet is tagged
+with a tracker shared with the other instances loaded by the same query. When
+more than ``threshold`` of those sibling instances lazily load the same
+curated field, a NPlusOneWarning is issued (or NPlusOneError raised) naming
+the model, the field, the call site, and the prefetch to use::
+
+    from curation import debug
+
+    debug.enable_n_plus_one_detection(threshold=5, action='raise')
+
+or, e.g. in a test::
+
+    with debug.detect_n_plus_one():
+        render_homepage()
+
+Only querysets of models whose manager is a CuratedItemManager are tracked.
+"""
+import os
+import traceback
+import warnings
+from contextlib import contextmanager
+
+import django
+
+
+#: The active NPlusOneDetector, or None if detection is disabled
+detector = None
+
+
+class NPlusOneWarning(RuntimeWarning):
+    pass
+
+
+class NPlusOneError(RuntimeError):
+    pass
+
+
+class SiblingLoads(object):
+    """Counts the lazy loads made by the instances from one query."""
+
+    __slots__ = ('counts', 'reported')
+
+    def __init__(self):
+        self.counts = {}
+        self.reported = set()
+
+
+_ignored_paths = (
+    os.path.dirname(os.path.abspath(__file__)),
+    os.path.dirname(os.path.abspath(django.__file__)),
+)
+
+
+def get_call_site():
+    """
+    Return the innermost stack frame outside of curation and django, as a
+    traceback.FrameSummary, or None.
+    """
+    for frame in reversed(traceback.extract_stack()):
+        if not os.path.abspath(frame.filename).startswith(_ignored_paths):
+            return frame
+    return None
+
+
+class NPlusOneDetector(object):
+
+    def __init__(self, threshold=3, action='warn'):
+        if action not in ('warn', 'raise'):
+            raise ValueError("action must be 'warn' or 'raise', not %r" % action)
+        self.threshold = threshold
+        self.action = action
+
+    def track(self, instances):
+        """Tag ``instances``, loaded by the same query, as siblings."""
+        if len(instances) <= self.threshold:
+            return
+        loads = SiblingLoads()
+        for instance in instances:
+            instance.__dict__['_curation_sibling_loads'] = loads
+
+    def record_load(self, instance, field):
+        """
+        Record that ``instance`` lazily loaded the related object for curated
+        field ``field``.
+        """
+        loads = instance.__dict__.get('_curation_sibling_loads')
+        if loads is None:
+            return
+        count = loads.counts[field.name] = loads.counts.get(field.name, 0) + 1
+        if count > self.threshold and field.name not in loads.reported:
+            loads.reported.add(field.name)
+            self.report(instance, field, count)
+
+    def report(self, instance, field, count):
+        opts = instance._meta
+        if getattr(field, 'ct_field', None) is not None:
+            suggestion = "prefetch_related(%r)" % field.name
+        else:
+            suggestion = "select_related(%r) or prefetch_related(%r)" % (
+                field.name, field.name)
+        call_site = get_call_site()
+        if call_site is not None:
+            location = " at %s:%d in %s()" % (
+                call_site.filename, call_site.lineno, call_site.name)
+        else:
+            location = ""
+        msg = ("N+1 queries: %(count)d %(app_label)s.%(model_name)s instances loaded by the "
+               "same query lazily loaded their %(field)r related object%(location)s. "
+               "Use %(suggestion)s on the queryset.") % {
+                   'count': count,
+                   'app_label': opts.app_label,
+                   'model_name': opts.object_name,
+                   'field': field.name,
+                   'location': location,
+                   'suggestion': suggestion}
+        if self.action == 'raise':
+            raise NPlusOneError(msg)
+        warnings.warn(msg, NPlusOneWarning)
+
+
+def enable_n_plus_one_detection(threshold=3, action='warn'):
+    """
+    Enable N+1 detection. ``action`` is either 'warn' (issue a
+    NPlusOneWarning) or 'raise' (raise NPlusOneError) when more than
+    ``threshold`` siblings lazily load the same curated field.
+    """
+    global detector
+    detector = NPlusOneDetector(threshold=threshold, action=action)
+
+
+def disable_n_plus_one_detection():
+    global detector
+    detector = None
+
+
+@contextmanager
+def detect_n_plus_one(threshold=3, action='warn'):
+    """Context manager that enables N+1 detection within its block."""
+    global detector
+    previous = detector
+    enable_n_plus_one_detection(threshold=threshold, action=action)
+    try:
+        yield detector
+    finally:
+        detector = previous
@@ -0,0 +1,135 @@
+"""
+Opt-in cleanup of generic curated items when the objects they point to are
+deleted, enabled with the ``on_target_delete`` argument of
+CuratedGenericForeignKey::
+
+    content_object = CuratedGenericForeignKey(
+        'content_type', 'object_id', on_target_delete=deletion.CASCADE)
+
+Receivers are connected for each model in the ``ct_choices`` of the
+content type field (or for every model, if it doesn't have ct_choices).
+``pre_delete`` buffers the pks of the objects being deleted, and the
+``post_delete`` that follows flushes the buffer with one DELETE (or UPDATE,
+for SET_NULL) of the curated items per content type, per batch of pks. Since
+Django's deletion collector sends ``pre_delete`` for every object it deletes
+before sending any ``post_delete``, deleting a queryset of 10,000 targets
+runs one query per batch rather than one per target.
+
+The buffer belongs to the transaction the collector runs the delete in. If
+the delete fails after ``pre_delete`` is sent, that transaction (or the
+savepoint around the delete) is rolled back, and the pks buffered in it are
+dropped rather than flushed by the next delete.
+"""
+import threading
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections, transaction
+from django.db.models import signals
+from django.db.models.fields.related import lazy_related_operation
+
+from . import counters
+from .prefetch import _batches
+
+
+#: Delete the curated items pointing to a deleted object
+CASCADE = 'cascade'
+
+#: Set the content type and object id of the curated items pointing to a
+#: deleted object to NULL. Both fields must be nullable.
+SET_NULL = 'set_null'
+
+
+def get_ct_choices_relations(ct_field):
+    """
+    Return the model relations (model classes, or strings resolvable with
+    lazy_related_operation()) in the ct_choices of ``ct_field``, skipping
+    'self.field_name' choices, or None if it doesn't have ct_choices.
+    """
+    ct_choices = getattr(ct_field, 'ct_choices', None)
+    if ct_choices is None:
+        return None
+    relations = []
+    for ct_choice in ct_choices.ct_choices:
+        relation = ct_choice[0]
+        if isinstance(relation, str):
+            relation = relation.split(':')[0]
+            if relation.startswith('self.'):
+                continue
+        relations.append(relation)
+    return relations
+
+
+class TargetDeleteHandler(object):
+    """
+    Handles the deletion of the related objects of the CuratedGenericForeignKey
+    ``field`` on model ``model_cls`` per ``field.on_target_delete``.
+    """
+
+    def __init__(self, field, model_cls):
+        self.field = field
+        self.model = model_cls
+        self.local = threading.local()
+
+    def connect(self):
+        ct_field = self.model._meta.get_field(self.field.ct_field)
+        relations = get_ct_choices_relations(ct_field)
+        if relations is None:
+            self.connect_model(None)
+            return
+
+        def connect_models(model_cls, *target_models):
+            for target_model in target_models:
+                # 'app_label.ModelName:field' choices of proxies of the
+                # curated item model point to the item itself
+                if target_model._meta.concrete_model is not model_cls._meta.concrete_model:
+                    self.connect_model(target_model)
+
+        lazy_related_operation(connect_models, self.model, *relations)
+
+    def connect_model(self, sender):
+        signals.pre_delete.connect(self.pre_delete, sender=sender)
+        signals.post_delete.connect(self.post_delete, sender=sender)
+
+    def get_buffer(self, using):
+        """
+        Return the dict of the sets of pks of the objects being deleted on
+        ``using``, by content type id, for the current transaction.
+        """
+        buffers = self.local.__dict__.setdefault('buffers', {})
+        buffer = buffers.get(using)
+        # A rollback discards the on_commit() callbacks registered since the
+        # transaction (or savepoint) began, including the buffer's
+        if buffer is None or not any(
+                callback[1] == buffer.clear for callback in connections[using].run_on_commit):
+            buffer = buffers[using] = {}
+            transaction.on_commit(buffer.clear, using=using)
+        return buffer
+
+    def pre_delete(self, sender, instance, using, **kwargs):
+        if sender is self.model or instance.pk is None:
+            return
+        ct_id = ContentType.objects.db_manager(using).get_for_model(sender, False).pk
+        self.get_buffer(using).setdefault(ct_id, set()).add(instance.pk)
+
+    def post_delete(self, sender, instance, using, **kwargs):
+        buffer = self.get_buffer(using)
+        if buffer:
+            pks_by_ct_id = dict(buffer)
+            buffer.clear()
+            self.flush(pks_by_ct_id, using)
+
+    def flush(self, pks_by_ct_id, using):
+        field = self.field
+        queryset = self.model._base_manager.using(using)
+        for ct_id, pks in pks_by_ct_id.items():
+            for batch in _batches(pks, using):
+                items = queryset.filter(**{
+                    field.ct_attname: ct_id,
+                    '%s__in' % field.fk_field: batch,
+                })
+                if field.on_target_delete == CASCADE:
+                    group_ids = counters.get_counted_group_ids(items)
+                    items.delete()
+                    counters.refresh_item_groups(self.model, group_ids, using=using)
+                else:
+                    items.update(**{field.ct_attname: None, field.fk_field: None})
@@ -0,0 +1,81 @@
+"""
+Streaming export of curated items as JSON Lines (one JSON object per line).
+
+Items are fetched with ``iterator(chunk_size=...)`` and the related objects
+of each chunk are loaded with one query per related model (see
+``CuratedItemQuerySet.resolved()``), so memory use is bounded by the chunk
+size rather than the size of the group::
+
+    from curation.export import write_items
+
+    with open('homepage.jsonl', 'w') as f:
+        write_items(CuratedPost.objects.group('homepage'), f)
+
+Each line holds the item's concrete field values (by attname) and a
+``"target"`` object with the related object's model label, pk and proxied
+values. Values are read from the related object, except for the keys of
+``field_overrides``, which are read through the item so that its overrides
+apply. ``target`` is null if the item has no related object, or if it
+doesn't exist.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+def get_target_fields(item, target):
+    """
+    Return the names of the attributes of ``item`` proxied from ``target``
+    to export: the item model's ``proxy_fields`` if set, otherwise the
+    attnames of the concrete fields of ``target``.
+    """
+    if item.proxy_fields is not None:
+        return list(item.proxy_fields)
+    return [f.attname for f in target._meta.concrete_fields]
+
+
+def export_items(queryset, fields=None, chunk_size=500):
+    """
+    Yield a dict for each item in ``queryset`` (a CuratedItemQuerySet).
+
+    ``fields`` are the names of the proxied attributes to export for each
+    target; the default is given by get_target_fields().
+    """
+    item_fields = None
+    target_fields = {}
+    for item in queryset.resolved(chunk_size=chunk_size):
+        opts = item._meta
+        if item_fields is None:
+            item_fields = [f.attname for f in opts.concrete_fields]
+        record = dict((name, getattr(item, name)) for name in item_fields)
+        target = getattr(item, opts._curated_proxy_field_name)
+        if target is None:
+            record['target'] = None
+        else:
+            target_cls = type(target)
+            if target_cls not in target_fields:
+                target_fields[target_cls] = fields or get_target_fields(item, target)
+            target_opts = target._meta
+            values = {
+                'model': '%s.%s' % (target_opts.app_label, target_opts.model_name),
+                'pk': target.pk,
+            }
+            # Not getattr(item, name), which returns the item's own attribute
+            # for names such as id or position
+            for name in target_fields[target_cls]:
+                source = item if name in item.field_overrides else target
+                values[name] = getattr(source, name, None)
+            record['target'] = values
+        yield record
+
+
+def write_items(queryset, stream, fields=None, chunk_size=500):
+    """
+    Write the items in ``queryset`` to the text file ``stream`` as JSON
+    Lines, and return the number of items written.
+    """
+    count = 0
+    for record in export_items(queryset, fields=fields, chunk_size=chunk_size):
+        stream.write(json.dumps(record, cls=DjangoJSONEncoder, sort_keys=True) + '\n')
+        count += 1
+    return count
@@ -1,5 +1,8 @@
-from django.core import exceptions, validators
+from time import perf_counter
+
+from django.core import checks, exceptions, validators
 from django.db import models
+from django.db.models import signals
 from django.apps import apps
 from django.core.exceptions import FieldDoesNotExist
 from django.db.models.fields.related import ForeignKey
@@ -9,6 +12,7 @@ from django.utils.encoding import force_str
 from django.utils.functional import cached_property, lazy
 from django.contrib.contenttypes.models import ContentType
 
+from . import debug, deletion, instrumentation
 from .generic import GenericForeignKey
 from .widgets import SourceSelect
 
@@ -48,6 +52,9 @@ class CuratedRelatedField(object):
         setattr(cls._meta, '_curated_proxy_field_name', name)
         setattr(cls._meta, '_curated_field_is_generic',
             bool(getattr(self, 'ct_field', None) is not None))
+        # Maps related model classes to {attr: error message} dicts of names
+        # which CuratedItem.__getattr__() has found are not proxied
+        setattr(cls._meta, '_missing_proxy_attrs', {})
 
     def contribute_to_instance(self, instance, related_cls):
         """
@@ -65,6 +72,7 @@ class CuratedRelatedField(object):
         current_proxy_model = instance.__dict__.get('_proxy_model', None)
         if current_proxy_model is related_cls:
             return
+        start = instrumentation.enabled and perf_counter()
         skips = ('DoesNotExist', 'MultipleObjectsReturned', '__doc__', '_meta',
                  '__module__', '_base_manager', '_default_manager', 'objects',
                  instance._meta._curated_proxy_field_name)
@@ -75,8 +83,12 @@ class CuratedRelatedField(object):
             if parent_cls in (object, models.Model):
                 continue
             proxy_attrs = proxy_attrs.union([k for k in parent_cls.__dict__ if k not in skips])
+        proxy_attrs = proxy_attrs.union(getattr(instance, 'proxy_fields', None) or ())
         setattr(instance, '_proxy_attrs', proxy_attrs)
         setattr(instance, '_proxy_model', related_cls)
+        if start:
+            instrumentation.emit('contribute_to_instance', perf_counter() - start,
+                                 model=related_cls)
 
     def contribute_to_related_class(self, cls, related):
         """
@@ -98,15 +110,123 @@ class CuratedRelatedField(object):
                  '__module__', '_base_manager', '_default_manager', 'objects',)
         proxy_attrs = set([f.name for f in cls._meta.fields])
         proxy_attrs = proxy_attrs.union([k for k in cls.__dict__ if k not in skips])
+        proxy_attrs = proxy_attrs.union(getattr(self.model, 'proxy_fields', None) or ())
         setattr(related.model._meta, '_proxy_attrs', proxy_attrs)
+        # Lets CuratedItem.__getattr__() find the proxy attributes without
+        # loading the related object
+        setattr(self.model._meta, '_curated_proxy_model', related.model)
+
+    def get_proxy_only_fields(self, related_cls):
+        """
+        Return the names of the concrete fields of ``related_cls`` to load
+        with ``only()``, per the ``proxy_fields`` and ``field_overrides`` of
+        the curated item model, or None if it doesn't define proxy_fields.
+        """
+        proxy_fields = getattr(self.model, 'proxy_fields', None)
+        if proxy_fields is None:
+            return None
+        only_fields = self.__dict__.setdefault('_proxy_only_fields', {})
+        try:
+            return only_fields[related_cls]
+        except KeyError:
+            pass
+        names = set(proxy_fields).union(getattr(self.model, 'field_overrides', {}))
+        if getattr(self, 'ct_field', None) is None and not self.target_field.primary_key:
+            # The to_field that the items' ForeignKey values are matched on
+            names.add(self.target_field.name)
+        only_fields[related_cls] = [
+            f.name for f in related_cls._meta.concrete_fields
+            if f.name in names or f.attname in names]
+        return only_fields[related_cls]
+
+
+class CuratedForwardManyToOneDescriptor(ForwardManyToOneDescriptor):
+    """
+    The descriptor for CuratedForeignKey. Loads the related object with only
+    the fields named in the curated item model's ``proxy_fields``, if defined,
+    and reports lazy loads to the N+1 detector in curation.debug.
+    """
+
+    def __get__(self, instance, cls=None):
+        if instance is not None and debug.detector is not None and not self.field.is_cached(
+                instance) and getattr(instance, self.field.attname) is not None:
+            debug.detector.record_load(instance, self.field)
+        return super(CuratedForwardManyToOneDescriptor, self).__get__(instance, cls)
+
+    def get_queryset(self, **hints):
+        queryset = super(CuratedForwardManyToOneDescriptor, self).get_queryset(**hints)
+        only_fields = self.field.get_proxy_only_fields(queryset.model)
+        if only_fields is not None:
+            queryset = queryset.only(*only_fields)
+        return queryset
 
 
 class CuratedForeignKey(CuratedRelatedField, ForeignKey):
-    pass
+    forward_related_accessor_class = CuratedForwardManyToOneDescriptor
 
 
 class CuratedGenericForeignKey(CuratedRelatedField, GenericForeignKey):
-    pass
+    """
+    Takes two optional keyword arguments:
+
+    on_target_delete: Either ``curation.deletion.CASCADE`` or
+                      ``curation.deletion.SET_NULL``, to delete (or null the
+                      content type and object id of) the curated items
+                      pointing to an object when it is deleted. See
+                      curation.deletion.
+    db_index:         If True, add an index on the (content type, object id)
+                      columns to the model's Meta.indexes, for looking up the
+                      items that point to given objects, e.g. with
+                      CuratedItemQuerySet.groups_containing().
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.on_target_delete = kwargs.pop('on_target_delete', None)
+        self.db_index = kwargs.pop('db_index', False)
+        if self.on_target_delete not in (None, deletion.CASCADE, deletion.SET_NULL):
+            raise ValueError("on_target_delete must be None, %r or %r, not %r" % (
+                deletion.CASCADE, deletion.SET_NULL, self.on_target_delete))
+        super(CuratedGenericForeignKey, self).__init__(*args, **kwargs)
+
+    def contribute_to_class(self, cls, name):
+        super(CuratedGenericForeignKey, self).contribute_to_class(cls, name)
+        if self.db_index and not cls._meta.abstract and not cls._meta.proxy:
+            self.add_index(cls)
+        if self.on_target_delete and not cls._meta.abstract and not cls._meta.proxy:
+            signals.class_prepared.connect(self.connect_target_delete_handler, sender=cls)
+
+    def add_index(self, cls):
+        fields = [self.ct_field, self.fk_field]
+        opts = cls._meta
+        if any(list(index.fields) == fields for index in opts.indexes):
+            return
+        # Django names the index once all of the model's fields are added.
+        # Migrations only see indexes declared in the model's Meta, which
+        # is what original_attrs holds.
+        opts.indexes = list(opts.indexes) + [models.Index(fields=fields)]
+        opts.original_attrs['indexes'] = opts.indexes
+
+    def connect_target_delete_handler(self, sender, **kwargs):
+        self.target_delete_handler = deletion.TargetDeleteHandler(self, sender)
+        self.target_delete_handler.connect()
+
+    def check(self, **kwargs):
+        errors = super(CuratedGenericForeignKey, self).check(**kwargs)
+        if self.on_target_delete == deletion.SET_NULL:
+            opts = self.model._meta
+            for field_name in (self.ct_field, self.fk_field):
+                try:
+                    field = opts.get_field(field_name)
+                except FieldDoesNotExist:
+                    continue
+                if not field.null:
+                    errors.append(checks.Error(
+                        "'%s.%s' must be nullable if on_target_delete is SET_NULL." % (
+                            opts.object_name, field_name),
+                        obj=self,
+                        id='curation.E001',
+                    ))
+        return errors
 
 
 class ContentTypeIdChoices(object):
@@ -160,6 +280,15 @@ class ContentTypeSourceChoices(object):
         """
         Look up the source_value associated with a content_type string
         """
+        start = instrumentation.enabled and perf_counter()
+        try:
+            return self._lookup_source_value(ct_model_str)
+        finally:
+            if start:
+                instrumentation.emit('ct_choices_lookup', perf_counter() - start,
+                                     field=self.field, kind='source_value')
+
+    def _lookup_source_value(self, ct_model_str):
         if ct_model_str is None:
             return ""
 
@@ -194,6 +323,15 @@ class ContentTypeSourceChoices(object):
         """
         Look up the content_type_id associated with the source value `source_value`
         """
+        start = instrumentation.enabled and perf_counter()
+        try:
+            return self._lookup_content_type(source_value)
+        finally:
+            if start:
+                instrumentation.emit('ct_choices_lookup', perf_counter() - start,
+                                     field=self.field, kind='content_type')
+
+    def _lookup_content_type(self, source_value):
         if source_value is None or force_str(source_value) == "":
             return None
 
@@ -332,6 +470,13 @@ class ContentTypeSourceDescriptor(ForwardManyToOneDescriptor):
         self.cache_name = self.field.get_cache_name()
 
     def __get__(self, instance, instance_type=None):
+        if instance is not None and not self.field.is_cached(instance):
+            # Load the content type through ContentType's manager cache rather
+            # than with a query per instance
+            ct_id = getattr(instance, self.field.attname)
+            if ct_id is not None:
+                self.field.set_cached_value(instance, ContentType.objects.db_manager(
+                    instance._state.db).get_for_id(ct_id))
         return super(ContentTypeSourceDescriptor, self).__get__(instance, instance_type)
 
     def __set__(self, instance, value):
@@ -469,6 +614,14 @@ class ContentTypeChoiceField(forms.TypedChoiceField):
             'data-fk-field-name': field.fk_field})
         super(ContentTypeChoiceField, self).__init__(*args, **kwargs)
 
+    def __deepcopy__(self, memo):
+        # The choices are built from ct_choices once, when the form class is
+        # created. Share them with the copies of the field made for each form
+        # (and with their SourceSelect widgets) rather than deep copying them.
+        result = super(forms.ChoiceField, self).__deepcopy__(memo)
+        result._choices = self._choices
+        return result
+
     def valid_value(self, value):
         """
         Check to see if the provided value is a valid choice
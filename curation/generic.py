@@ -1,7 +1,61 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import connections, router
 from django.db.models import signals
+from django.utils.functional import cached_property
 from django.contrib.contenttypes.fields import GenericForeignKey as _GenericForeignKey
 
+from . import debug, instrumentation
+from .prefetch import _batches
+
+
+#: Maps ``(model_cls, using)`` to a ``(content_type_id, pk_to_python)`` tuple.
+#: Used by GenericForeignKey.__get__() to validate a cached related object
+#: without going through the ContentType manager and walking the pk's
+#: remote_field chain on every access.
+_target_meta_cache = {}
+
+
+def get_target_meta(model_cls, using):
+    """
+    Return a tuple of the content type id of ``model_cls`` in database
+    ``using`` and the ``to_python`` callable for its primary key.
+    """
+    key = (model_cls, using)
+    try:
+        return _target_meta_cache[key]
+    except KeyError:
+        pass
+    from django.contrib.contenttypes.models import ContentType
+    ct_id = ContentType.objects.db_manager(using).get_for_model(model_cls, False).id
+    # If the primary key is a remote field, use the referenced field's
+    # to_python().
+    to_python_field = model_cls._meta.pk
+    # Out of an abundance of caution, avoid infinite loops.
+    seen = {to_python_field}
+    while to_python_field.remote_field:
+        to_python_field = to_python_field.target_field
+        if to_python_field in seen:
+            break
+        seen.add(to_python_field)
+    meta = _target_meta_cache[key] = (ct_id, to_python_field.to_python)
+    return meta
+
+
+def clear_target_meta_cache(**kwargs):
+    """
+    Clear the cache used by get_target_meta(). Connected to post_migrate,
+    since that is when content type ids can change.
+    """
+    _target_meta_cache.clear()
+
+
+signals.post_migrate.connect(clear_target_meta_cache)
+
 
 class GenericForeignKey(_GenericForeignKey):
     """
@@ -15,6 +69,9 @@ class GenericForeignKey(_GenericForeignKey):
 
     def contribute_to_class(self, cls, name):
         super(GenericForeignKey, self).contribute_to_class(cls, name)
+        # The key in instance.__dict__ of the (content type id, object id) for
+        # which the related object was found not to exist
+        self.missing_target_attname = '_%s_missing_target' % name
         signals.post_init.connect(self.instance_post_init, sender=cls)
 
         if not cls._meta.proxy:
@@ -39,6 +96,10 @@ class GenericForeignKey(_GenericForeignKey):
             else:
                 self.contribute_to_instance(instance, model_cls)
 
+    @cached_property
+    def ct_attname(self):
+        return self.model._meta.get_field(self.ct_field).get_attname()
+
     def get_content_type(self, obj=None, id=None, using=None):
         """
         Identical to parent method except uses our proxy model of ContentType
@@ -54,35 +115,173 @@ class GenericForeignKey(_GenericForeignKey):
             # This should never happen. I love comments like this, don't you?
             raise Exception("Impossible arguments to GFK.get_content_type!")
 
+    def get_target_db(self, model_cls, instance):
+        """
+        Return the database to load the related object of ``instance``, of
+        ``model_cls``, from: as routed by the database routers'
+        ``db_for_read()``, with ``instance`` as a hint. Without routers, this
+        is the database of ``instance``.
+        """
+        return router.db_for_read(model_cls, instance=instance)
+
+    def get_target_queryset(self, model_cls, using):
+        """
+        Return the queryset used to load related objects of ``model_cls``
+        from database ``using``.
+        """
+        queryset = model_cls._base_manager.using(using)
+        # This code is specific to django-curation. It applies the
+        # proxy_fields of the curated item model
+        if hasattr(self, 'get_proxy_only_fields'):
+            only_fields = self.get_proxy_only_fields(model_cls)
+            if only_fields is not None:
+                queryset = queryset.only(*only_fields)
+        return queryset
+
+    def get_prefetch_queryset(self, instances, queryset=None):
+        """
+        Identical to parent method except loads related objects with
+        get_target_queryset()
+        """
+        if queryset is not None:
+            raise ValueError("Custom queryset can't be used for this lookup.")
+
+        # For efficiency, group the instances by database and content type and
+        # then do one query per (routed database, model)
+        fk_dict = defaultdict(set)
+        # We need one instance for each group as a hint for the router:
+        instance_dict = {}
+        ct_attname = self.ct_attname
+        for instance in instances:
+            # We avoid looking for values if either ct_id or fkey value is None
+            ct_id = getattr(instance, ct_attname)
+            if ct_id is not None:
+                fk_val = getattr(instance, self.fk_field)
+                if fk_val is not None:
+                    key = (instance._state.db, ct_id)
+                    fk_dict[key].add(fk_val)
+                    instance_dict[key] = instance
+
+        pks_by_db_model = defaultdict(set)
+        for key, fkeys in fk_dict.items():
+            instance = instance_dict[key]
+            ct = self.get_content_type(id=key[1], using=instance._state.db)
+            model_cls = ct.model_class()
+            if model_cls is None:
+                continue
+            using = self.get_target_db(model_cls, instance)
+            pks_by_db_model[using, model_cls].update(fkeys)
+        ret_val = self.load_targets(pks_by_db_model)
+
+        found_keys = set((obj.pk, obj.__class__) for obj in ret_val)
+        missing_target_attname = self.missing_target_attname
+
+        # For doing the join in Python, we have to match both the FK val and the
+        # content type, so we use a callable that returns a (fk, class) pair.
+        def gfk_key(obj):
+            ct_id = getattr(obj, ct_attname)
+            if ct_id is None:
+                return None
+            else:
+                model = self.get_content_type(id=ct_id,
+                                              using=obj._state.db).model_class()
+                fk_val = getattr(obj, self.fk_field)
+                key = (model._meta.pk.get_prep_value(fk_val), model)
+                if key not in found_keys and fk_val is not None:
+                    # Lets __get__() return None without querying again
+                    obj.__dict__[missing_target_attname] = (ct_id, fk_val)
+                return key
+
+        # Unlike the parent, the related objects are stored in the fields
+        # cache (is_descriptor=False) rather than set with __set__(), which
+        # would clear the content type and object id of the instances whose
+        # related object doesn't exist.
+        return (
+            ret_val,
+            lambda obj: (obj.pk, obj.__class__),
+            gfk_key,
+            True,
+            self.name,
+            False,
+        )
+
+    def load_targets(self, pks_by_db_model):
+        """
+        Return a list of the related objects with the pks in the values of
+        ``pks_by_db_model``, a dict keyed by ``(database, model_cls)``, with
+        one query per key (per batch of pks, on databases with a parameter
+        limit).
+
+        If the CURATION_PARALLEL_TARGET_LOADS setting is True, and the objects
+        are on more than one database, the queries for each database are run
+        in a thread of their own, on a connection that is closed afterwards.
+        Not while any of the databases is in a transaction, whose writes the
+        threads' connections wouldn't see.
+        """
+        querysets_by_db = defaultdict(list)
+        for (using, model_cls), pks in pks_by_db_model.items():
+            queryset = self.get_target_queryset(model_cls, using)
+            querysets_by_db[using].extend(
+                queryset.filter(pk__in=batch) for batch in _batches(pks, using))
+
+        def load(querysets):
+            return [obj for queryset in querysets for obj in queryset]
+
+        parallel = getattr(settings, 'CURATION_PARALLEL_TARGET_LOADS', False)
+        if len(querysets_by_db) < 2 or not parallel or any(
+                connections[using].in_atomic_block for using in querysets_by_db):
+            return load([qs for querysets in querysets_by_db.values() for qs in querysets])
+
+        def load_in_thread(using, querysets):
+            try:
+                return load(querysets)
+            finally:
+                connections[using].close()
+
+        with ThreadPoolExecutor(max_workers=len(querysets_by_db)) as executor:
+            futures = [executor.submit(load_in_thread, using, querysets)
+                       for using, querysets in querysets_by_db.items()]
+            return [obj for future in futures for obj in future.result()]
+
+    def cache_related_objects(self, instances):
+        """
+        Load the related objects of ``instances`` with one query per content
+        type and cache them on the instances. Unlike prefetch_related(),
+        instances whose related object doesn't exist keep their content type
+        and object id, and are remembered as missing their related object, so
+        that accessing the field doesn't query for it again.
+        """
+        rel_objs, rel_obj_attr, instance_attr = self.get_prefetch_queryset(instances)[:3]
+        rel_obj_cache = dict((rel_obj_attr(rel_obj), rel_obj) for rel_obj in rel_objs)
+        ct_attname = self.ct_attname
+        for instance in instances:
+            rel_obj = rel_obj_cache.get(instance_attr(instance))
+            if rel_obj is None:
+                instance.__dict__[self.missing_target_attname] = (
+                    getattr(instance, ct_attname), getattr(instance, self.fk_field))
+            self.set_cached_value(instance, rel_obj)
+
     def __get__(self, instance, instance_type=None):
         if instance is None:
             return self
 
-        f = self.model._meta.get_field(self.ct_field)
-        ct_id = getattr(instance, f.get_attname(), None)
+        ct_id = getattr(instance, self.ct_attname, None)
         pk_val = getattr(instance, self.fk_field)
 
         rel_obj = self.get_cached_value(instance, default=None)
         if rel_obj is not None:
-            if ct_id != self.get_content_type(obj=rel_obj, using=instance._state.db).id:
-                rel_obj = None
-            else:
-                pk = rel_obj._meta.pk
-                # If the primary key is a remote field, use the referenced
-                # field's to_python().
-                to_python_field = pk
-                # Out of an abundance of caution, avoid infinite loops.
-                seen = {to_python_field}
-                while to_python_field.remote_field:
-                    to_python_field = to_python_field.target_field
-                    if to_python_field in seen:
-                        break
-                    seen.add(to_python_field)
-                pk_to_python = to_python_field.to_python
-                if pk_to_python(pk_val) != rel_obj._get_pk_val():
-                    rel_obj = None
-                else:
-                    return rel_obj
+            # The content type id is that of the instance's database, which
+            # isn't necessarily the one the related object was loaded from
+            rel_ct_id, pk_to_python = get_target_meta(rel_obj.__class__, instance._state.db)
+            rel_pk = rel_obj.pk
+            if ct_id == rel_ct_id and (pk_val == rel_pk or pk_to_python(pk_val) == rel_pk):
+                if instrumentation.enabled:
+                    instrumentation.emit('gfk_cache_hit')
+                return rel_obj
+            rel_obj = None
+        elif pk_val is not None and instance.__dict__.get(
+                self.missing_target_attname) == (ct_id, pk_val):
+            return None
 
         if ct_id is not None:
             ct = self.get_content_type(id=ct_id, using=instance._state.db)
@@ -98,10 +297,18 @@ class GenericForeignKey(_GenericForeignKey):
                 else:
                     self.contribute_to_instance(instance, model_cls)
 
-            try:
-                rel_obj = ct.get_object_for_this_type(pk=pk_val)
-            except ObjectDoesNotExist:
-                pass
+            model_cls = ct.model_class()
+            if model_cls is not None:
+                if debug.detector is not None:
+                    debug.detector.record_load(instance, self)
+                start = instrumentation.enabled and perf_counter()
+                try:
+                    rel_obj = self.get_target_queryset(
+                        model_cls, self.get_target_db(model_cls, instance)).get(pk=pk_val)
+                except ObjectDoesNotExist:
+                    instance.__dict__[self.missing_target_attname] = (ct_id, pk_val)
+                if start:
+                    instrumentation.emit('gfk_load', perf_counter() - start, model=model_cls)
         self.set_cached_value(instance, rel_obj)
         return rel_obj
 
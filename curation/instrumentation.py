@@ -0,0 +1,111 @@
+"""
+Optional instrumentation of curation internals.
+
+Instrumented code paths emit events (a name, a duration in seconds or None,
+and a dict of extra data) to the registered sinks. Events are:
+
+``gfk_load``
+    GenericForeignKey.__get__ loaded the related object from the database.
+    Data: ``model``.
+``gfk_cache_hit``
+    GenericForeignKey.__get__ returned the cached related object.
+``contribute_to_instance``
+    CuratedRelatedField.contribute_to_instance recomputed the proxy
+    attributes of an instance. Data: ``model`` (the related model).
+``proxied_read``
+    CuratedItem.__getattr__ returned a proxied (or overridden) value.
+    Data: ``model``, ``attr``.
+``proxied_miss``
+    CuratedItem.__getattr__ raised AttributeError. Data: ``model``, ``attr``.
+``ct_choices_lookup``
+    ContentTypeSourceChoices looked up a source value or content type.
+    Data: ``field``, ``kind`` (``'source_value'`` or ``'content_type'``).
+
+When no sinks are registered ``enabled`` is False, and the instrumented code
+paths do nothing beyond checking it.
+
+To log every event::
+
+    from curation import instrumentation
+    instrumentation.add_sink(instrumentation.LoggingSink())
+
+See ``curation.middleware.CurationInstrumentationMiddleware`` for per-request
+summaries.
+"""
+import logging
+
+from django.dispatch import Signal
+
+#: True if any sinks are registered. Checked by instrumented code before doing
+#: any work.
+enabled = False
+
+_sinks = ()
+
+#: Sent by SignalSink for each event, with ``name``, ``duration`` and ``data``
+#: keyword arguments.
+curation_event = Signal()
+
+
+def add_sink(sink):
+    """
+    Register ``sink``, a callable taking ``(name, duration, data)``, and
+    enable instrumentation.
+    """
+    global _sinks, enabled
+    if sink not in _sinks:
+        _sinks = _sinks + (sink,)
+    enabled = True
+
+
+def remove_sink(sink):
+    """Unregister ``sink``, disabling instrumentation if it was the last one."""
+    global _sinks, enabled
+    _sinks = tuple(s for s in _sinks if s != sink)
+    enabled = bool(_sinks)
+
+
+def emit(name, duration=None, **data):
+    for sink in _sinks:
+        sink(name, duration, data)
+
+
+class LoggingSink(object):
+    """A sink that logs each event to the ``curation.instrumentation`` logger."""
+
+    def __init__(self, logger='curation.instrumentation', level=logging.DEBUG):
+        self.logger = logging.getLogger(logger)
+        self.level = level
+
+    def __call__(self, name, duration, data):
+        if not self.logger.isEnabledFor(self.level):
+            return
+        if duration is None:
+            self.logger.log(self.level, "%s %r", name, data)
+        else:
+            self.logger.log(self.level, "%s %.3fms %r", name, duration * 1000, data)
+
+
+class SignalSink(object):
+    """A sink that sends the ``curation_event`` signal for each event."""
+
+    def __call__(self, name, duration, data):
+        curation_event.send(sender=None, name=name, duration=duration, data=data)
+
+
+class EventStats(object):
+    """A sink that aggregates the count and total duration of each event."""
+
+    def __init__(self):
+        self.counts = {}
+        self.durations = {}
+
+    def __call__(self, name, duration, data):
+        self.counts[name] = self.counts.get(name, 0) + 1
+        if duration is not None:
+            self.durations[name] = self.durations.get(name, 0.0) + duration
+
+    def summary(self):
+        """Return a dict mapping event names to ``(count, total_duration)``."""
+        return dict((name, (count, self.durations.get(name, 0.0)))
+                    for name, count in self.counts.items())
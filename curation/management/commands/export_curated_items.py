@@ -0,0 +1,55 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from curation.export import write_items
+from curation.models import CuratedItem, CuratedItemQuerySet
+
+
+class Command(BaseCommand):
+    help = ("Export the items of a CuratedItem model as JSON Lines, streaming "
+            "them in chunks so that memory use doesn't grow with the group size.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', help="The curated item model, as app_label.ModelName")
+        parser.add_argument(
+            '--group', action='append', dest='groups', default=[], metavar='SLUG',
+            help="Only export the items of the group with this slug. Can be repeated.")
+        parser.add_argument(
+            '--fields', default=None,
+            help="Comma-separated names of the proxied attributes to export. "
+                 "Defaults to the model's proxy_fields, or all target fields.")
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help="The number of items to fetch and resolve per query.")
+        parser.add_argument(
+            '-o', '--output', default='-',
+            help="The file to write to. Defaults to stdout.")
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        try:
+            model_cls = apps.get_model(options['model'])
+        except (LookupError, ValueError) as e:
+            raise CommandError(str(e))
+        if not issubclass(model_cls, CuratedItem):
+            raise CommandError("%s is not a CuratedItem model" % options['model'])
+        fields = options['fields'] and options['fields'].split(',')
+
+        queryset = CuratedItemQuerySet(model_cls, using=options['database'])
+        querysets = [queryset.group(slug) for slug in options['groups']] or [queryset]
+
+        if options['output'] == '-':
+            stream = self.stdout
+        else:
+            stream = open(options['output'], 'w')
+        try:
+            count = 0
+            for queryset in querysets:
+                count += write_items(
+                    queryset, stream, fields=fields, chunk_size=options['chunk_size'])
+        finally:
+            if stream is not self.stdout:
+                stream.close()
+        if options['verbosity'] > 1:
+            self.stderr.write("Exported %d items" % count)
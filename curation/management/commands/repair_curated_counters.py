@@ -0,0 +1,100 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from curation.counters import (
+    get_group_pk_ranges, has_counters, recount_group_range, refresh_counters)
+
+
+def init_worker():
+    # Each worker process opens its own connections
+    django.setup()
+
+
+def recount_range(label, first_pk, last_pk, using):
+    return recount_group_range(apps.get_model(label), first_pk, last_pk, using=using)
+
+
+class Command(BaseCommand):
+    help = ("Recompute the item_count and max_position counters of curated groups "
+            "from their items.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*', metavar='app_label.ModelName',
+            help="The curated group models to repair. Defaults to every model "
+                 "with CuratedGroupCounters.")
+        parser.add_argument(
+            '--group', action='append', dest='groups', metavar='SLUG',
+            help="Only repair the group with this slug. May be given more than once.")
+        parser.add_argument(
+            '--processes', type=int, default=None,
+            help="Recompute the counters in chunks of groups, with a pool of this "
+                 "many processes, rather than with one UPDATE per model.")
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help="The number of groups per chunk, with --processes.")
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def get_models(self, labels):
+        if not labels:
+            return [m for m in apps.get_models() if has_counters(m)]
+        models = []
+        for label in labels:
+            try:
+                model_cls = apps.get_model(label)
+            except (LookupError, ValueError) as e:
+                raise CommandError(str(e))
+            if not has_counters(model_cls):
+                raise CommandError("%s does not have CuratedGroupCounters" % label)
+            models.append(model_cls)
+        return models
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if options['processes'] is not None and options['groups']:
+            raise CommandError("--group can't be used with --processes")
+        for model_cls in self.get_models(options['models']):
+            if options['processes'] is not None:
+                updated = self.recount_in_chunks(
+                    model_cls, options['processes'], options['chunk_size'], using)
+            else:
+                pks = None
+                if options['groups']:
+                    pks = model_cls._base_manager.using(using).filter(
+                        slug__in=options['groups']).values_list('pk', flat=True)
+                updated = refresh_counters(model_cls, pks, using=using)
+            self.stdout.write("%s: repaired the counters of %d groups" % (
+                model_cls._meta.label, updated))
+
+    def recount_in_chunks(self, model_cls, processes, chunk_size, using):
+        label = model_cls._meta.label
+        ranges = list(get_group_pk_ranges(model_cls, chunk_size, using=using))
+        start = time.time()
+        updated = 0
+
+        def report(count):
+            elapsed = time.time() - start
+            self.stdout.write("%s: %d groups (%d/%d chunks) in %.1fs, %.0f groups/s" % (
+                label, updated, count, len(ranges), elapsed,
+                updated / elapsed if elapsed else 0))
+
+        if processes <= 1:
+            for i, (first_pk, last_pk) in enumerate(ranges, 1):
+                updated += recount_range(label, first_pk, last_pk, using)
+                report(i)
+            return updated
+
+        # Connections can't be shared with the forked workers
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=processes, initializer=init_worker) as executor:
+            futures = [executor.submit(recount_range, label, first_pk, last_pk, using)
+                       for first_pk, last_pk in ranges]
+            for i, future in enumerate(as_completed(futures), 1):
+                updated += future.result()
+                report(i)
+        return updated
@@ -0,0 +1,59 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from curation.dangling import delete_dangling_items, find_dangling_items
+
+
+class Command(BaseCommand):
+    help = ("Report (or, with --delete, delete) curated items whose "
+            "CuratedGenericForeignKey points to an object that no longer exists.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*', metavar='app_label.ModelName',
+            help="The curated item models to check. Defaults to every model "
+                 "with a CuratedGenericForeignKey.")
+        parser.add_argument(
+            '--delete', action='store_true',
+            help="Delete the dangling items instead of reporting them.")
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="The number of items to check, and delete, per query.")
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def get_models(self, labels):
+        if not labels:
+            return [m for m in apps.get_models()
+                    if getattr(m._meta, '_curated_field_is_generic', False)]
+        models = []
+        for label in labels:
+            try:
+                model_cls = apps.get_model(label)
+            except (LookupError, ValueError) as e:
+                raise CommandError(str(e))
+            if not getattr(model_cls._meta, '_curated_field_is_generic', False):
+                raise CommandError("%s does not have a CuratedGenericForeignKey" % label)
+            models.append(model_cls)
+        return models
+
+    def handle(self, *args, **options):
+        using = options['database']
+        batch_size = options['batch_size']
+        for model_cls in self.get_models(options['models']):
+            label = model_cls._meta.label
+            if options['delete']:
+                deleted = delete_dangling_items(model_cls, using=using, batch_size=batch_size)
+                self.stdout.write("%s: deleted %d dangling items" % (label, deleted))
+                continue
+            counts = {}
+            for ct, pks in find_dangling_items(model_cls, using=using, batch_size=batch_size):
+                counts[ct] = counts.get(ct, 0) + len(pks)
+                if options['verbosity'] > 1:
+                    self.stdout.write("%s: %s: %s" % (
+                        label, ct, ' '.join(str(pk) for pk in pks)))
+            for ct, count in counts.items():
+                self.stdout.write("%s: %d dangling items pointing to %s" % (
+                    label, count, ct or "a deleted content type"))
+            if not counts:
+                self.stdout.write("%s: no dangling items" % label)
@@ -0,0 +1,99 @@
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from curation.cache import warm_group
+from curation.models import CuratedItem
+
+
+class Command(BaseCommand):
+    help = ("Load the items of every curated group, with their related objects, "
+            "into the curation cache.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*', metavar='app_label.ModelName',
+            help="The curated item models to warm. Defaults to every CuratedItem "
+                 "model with a group that includes CuratedGroupVersion.")
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help="The number of threads loading groups at once.")
+        parser.add_argument(
+            '--limit', type=int, default=None,
+            help="The maximum number of groups to load.")
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def is_cacheable(self, model_cls):
+        return issubclass(model_cls, CuratedItem) and model_cls.group_has_version()
+
+    def get_models(self, labels):
+        if not labels:
+            return [m for m in apps.get_models() if self.is_cacheable(m)]
+        models = []
+        for label in labels:
+            try:
+                model_cls = apps.get_model(label)
+            except (LookupError, ValueError) as e:
+                raise CommandError(str(e))
+            if not self.is_cacheable(model_cls):
+                raise CommandError(
+                    "%s is not a CuratedItem model with a group that includes "
+                    "CuratedGroupVersion" % label)
+            models.append(model_cls)
+        return models
+
+    def get_tasks(self, models, using, limit):
+        tasks = []
+        for model_cls in models:
+            group_model = model_cls.get_group_field().related_model
+            slugs = group_model._base_manager.using(using).order_by(
+                'pk').values_list('slug', flat=True)
+            if limit is not None:
+                slugs = slugs[:max(limit - len(tasks), 0)]
+            tasks.extend((model_cls, slug) for slug in slugs)
+        return tasks
+
+    def warm(self, tasks, using, verbosity):
+        """Warm the groups in the queue ``tasks`` until it is empty."""
+        results = []
+        while True:
+            try:
+                model_cls, slug = tasks.get_nowait()
+            except queue.Empty:
+                return results
+            count = warm_group(model_cls, slug, using=using)
+            if verbosity > 1:
+                self.stdout.write("%s: %s: %s items" % (
+                    model_cls._meta.label, slug, count))
+            results.append(count or 0)
+
+    def warm_in_thread(self, tasks, using, verbosity):
+        try:
+            return self.warm(tasks, using, verbosity)
+        finally:
+            # The connections opened by the thread
+            connections.close_all()
+
+    def handle(self, *args, **options):
+        using = options['database']
+        verbosity = options['verbosity']
+        workers = max(options['workers'], 1)
+        tasks = queue.Queue()
+        for task in self.get_tasks(self.get_models(options['models']), using, options['limit']):
+            tasks.put(task)
+        group_count = tasks.qsize()
+
+        start = time.time()
+        if workers == 1:
+            counts = self.warm(tasks, using, verbosity)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(self.warm_in_thread, tasks, using, verbosity)
+                           for _ in range(workers)]
+                counts = [count for future in futures for count in future.result()]
+        self.stdout.write("Warmed %d groups (%d items) in %.2fs" % (
+            group_count, sum(counts), time.time() - start))
@@ -0,0 +1,50 @@
+import logging
+from contextvars import ContextVar
+from time import perf_counter
+
+from . import instrumentation
+
+
+logger = logging.getLogger('curation.instrumentation.requests')
+
+_request_stats = ContextVar('curation_request_stats', default=None)
+
+
+def request_stats_sink(name, duration, data):
+    """Forward events to the EventStats of the current request, if any."""
+    stats = _request_stats.get()
+    if stats is not None:
+        stats(name, duration, data)
+
+
+class CurationInstrumentationMiddleware(object):
+    """
+    Enables curation instrumentation and logs a summary of the curation
+    events of each request (with their counts and total durations) to the
+    ``curation.instrumentation.requests`` logger at INFO level. The
+    ``curation.instrumentation.EventStats`` for the request is also set as
+    ``request.curation_stats``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrumentation.add_sink(request_stats_sink)
+
+    def __call__(self, request):
+        stats = request.curation_stats = instrumentation.EventStats()
+        token = _request_stats.set(stats)
+        start = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_stats.reset(token)
+        elapsed = perf_counter() - start
+
+        summary = stats.summary()
+        if summary:
+            logger.info("%s %s %.1fms curation: %s", request.method, request.path,
+                elapsed * 1000, ", ".join(
+                    "%s=%d (%.1fms)" % (name, count, duration * 1000)
+                    for name, (count, duration) in sorted(summary.items())),
+                extra={'path': request.path, 'curation_stats': summary})
+        return response
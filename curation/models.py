@@ -1,9 +1,42 @@
-from django.db import models
-from django.core.exceptions import ObjectDoesNotExist
+from itertools import islice
+from time import perf_counter
 
+from django.db import models, router, transaction
+from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist
+
+from . import debug, instrumentation
+from .cache import invalidate_group_version
 from .base import CuratedItemModelBase
 
 
+class VersionConflict(Exception):
+    """
+    Raised when a curated group was changed after the version that a write
+    to it was based on.
+    """
+
+
+def exclude_maintained_fields(group, kwargs):
+    """
+    Make a save of an existing ``group`` leave out the fields of
+    CuratedGroupVersion and CuratedGroupCounters, which are maintained in the
+    database and may have changed since the instance was loaded. Saves that
+    insert, or that already name their ``update_fields``, are left alone.
+    """
+    if group.pk is None or group._state.adding:
+        return
+    if kwargs.get('force_insert') or kwargs.get('update_fields') is not None:
+        return
+    maintained = set()
+    if isinstance(group, CuratedGroupVersion):
+        maintained.add('version')
+    if isinstance(group, CuratedGroupCounters):
+        maintained.update(('item_count', 'max_position'))
+    kwargs['update_fields'] = [
+        f.name for f in group._meta.concrete_fields
+        if not f.primary_key and f.name not in maintained]
+
+
 class CuratedGroup(models.Model):
 
     name = models.CharField(max_length=255)
@@ -20,8 +53,122 @@ class CuratedGroup(models.Model):
         return self.name
 
 
-class CuratedItemManager(models.Manager):
-    """A manager that defines queryset helpers for CuratedItem."""
+class CuratedGroupVersion(models.Model):
+    """
+    Adds an optimistic version counter to a CuratedGroup model, so that
+    concurrent edits of a group can be detected and readers can key caches
+    on it (curation.cache requires it)::
+
+        class CuratedPostGroup(CuratedGroupVersion, CuratedGroup):
+            pass
+
+    Without it, saving or deleting an item doesn't write to its group.
+    """
+
+    #: Incremented whenever the group or its items are written through
+    #: curation (item save() / delete(), and the curated admin formsets), so
+    #: that concurrent edits can be detected and readers can key caches on it
+    version = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta(CuratedGroup.Meta):
+        # Keeps the options of CuratedGroup when listed before it
+        abstract = True
+
+    @classmethod
+    def get_version(cls, slug, using=None):
+        """
+        Return the version of the group with slug ``slug``, or None if it
+        doesn't exist, with a single-row query on the slug index.
+        """
+        return cls._base_manager.db_manager(using).filter(
+            slug=slug).values_list('version', flat=True).first()
+
+    def bump_version(self, expected=None):
+        """
+        Increment the version of the group in the database.
+
+        If ``expected`` is given, the version is only incremented if it is
+        still ``expected``, in the same UPDATE, and VersionConflict is raised
+        if it isn't. Call it in the transaction that writes the changes based
+        on version ``expected``.
+        """
+        queryset = type(self)._base_manager.using(self._state.db).filter(pk=self.pk)
+        if expected is None:
+            queryset.update(version=models.F('version') + 1)
+        elif not queryset.filter(version=expected).update(version=models.F('version') + 1):
+            raise VersionConflict(
+                "%s %r was changed by someone else after version %d" % (
+                    self._meta.verbose_name, self.slug, expected))
+        else:
+            self.version = expected + 1
+        invalidate_group_version(type(self), self.pk, self._state.db)
+
+    def save(self, *args, **kwargs):
+        exclude_maintained_fields(self, kwargs)
+        super(CuratedGroupVersion, self).save(*args, **kwargs)
+        # The slug the cached version was read by may have changed
+        invalidate_group_version(type(self), self.pk, self._state.db)
+
+    save.alters_data = True
+
+    def delete(self, *args, **kwargs):
+        pk, using = self.pk, self._state.db
+        result = super(CuratedGroupVersion, self).delete(*args, **kwargs)
+        invalidate_group_version(type(self), pk, using)
+        return result
+
+    delete.alters_data = True
+
+
+class CuratedGroupCounters(models.Model):
+    """
+    Adds denormalized counters of the group's items to a CuratedGroup model,
+    so that appending an item or checking whether a group is full doesn't
+    need an aggregate query over its items::
+
+        class CuratedPostGroup(CuratedGroupCounters, CuratedGroup):
+            pass
+
+    The counters are maintained by the saves and deletes of items whose
+    ``group`` ForeignKey points to the model; see curation.counters for the
+    writes that don't maintain them.
+    """
+
+    #: The number of items in the group
+    item_count = models.PositiveIntegerField(default=0, editable=False)
+
+    #: The largest position of the items in the group, or None if it is empty
+    max_position = models.IntegerField(null=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def next_position(self):
+        """The position to append an item to the group at."""
+        return 0 if self.max_position is None else self.max_position + 1
+
+    def save(self, *args, **kwargs):
+        exclude_maintained_fields(self, kwargs)
+        super(CuratedGroupCounters, self).save(*args, **kwargs)
+
+    save.alters_data = True
+
+    def refresh_counters(self):
+        """Recompute the counters of the group from its items."""
+        from .counters import refresh_counters
+        refresh_counters(type(self), [self.pk], using=self._state.db)
+        self.refresh_from_db(fields=['item_count', 'max_position'])
+
+
+class CuratedItemQuerySet(models.QuerySet):
+    """A queryset that defines helpers for CuratedItem."""
+
+    def _fetch_all(self):
+        super(CuratedItemQuerySet, self)._fetch_all()
+        if debug.detector is not None and self._result_cache and isinstance(
+                self._result_cache[0], CuratedItem):
+            debug.detector.track(self._result_cache)
 
     def group(self, slug):
         """
@@ -30,6 +177,115 @@ class CuratedItemManager(models.Manager):
         """
         return self.filter(group__slug=slug)
 
+    def views(self):
+        """
+        Return a list of read-only ``curation.readonly.CuratedItemView``
+        objects for the rows in the current queryset, built from
+        ``values_list()`` with one query for the items and one query per
+        related model.
+        """
+        from .readonly import get_item_views
+        return get_item_views(self)
+
+    def groups_containing(self, objs):
+        """
+        Return a dict mapping each object in ``objs`` (instances of any of the
+        models the curated field can point to) to a list of the
+        ``(group_slug, position)`` of the items in the current queryset that
+        point to it, ordered by slug and position. Objects of other models
+        map to an empty list.
+
+        Runs one query per related model (per content type, for a
+        CuratedGenericForeignKey, which should have ``db_index=True`` so the
+        query can use the (content type, object id) index).
+        """
+        from django.contrib.contenttypes.models import ContentType
+        from .prefetch import _batches
+
+        result = dict((obj, []) for obj in objs)
+        opts = self.model._meta
+        field = opts.get_field(opts._curated_proxy_field_name)
+        qs = self.order_by()
+        if getattr(opts, '_curated_field_is_generic', False):
+            fk_field = field.fk_field
+            objs_by_ct_id = {}
+            for obj in result:
+                ct = ContentType.objects.db_manager(obj._state.db).get_for_model(obj, False)
+                objs_by_ct_id.setdefault(ct.pk, []).append(obj)
+            lookups = []
+            for ct_id, ct_objs in objs_by_ct_id.items():
+                target_field = type(ct_objs[0])._meta.pk
+                lookups.append(
+                    (qs.filter(**{field.ct_attname: ct_id}), target_field, ct_objs))
+        else:
+            # The values of a ForeignKey with a to_field aren't the pks of
+            # the objects it points to
+            fk_field = field.attname
+            lookup_objs = [obj for obj in result if isinstance(obj, field.related_model)]
+            lookups = [(qs, field.target_field, lookup_objs)] if lookup_objs else []
+
+        for queryset, target_field, lookup_objs in lookups:
+            objs_by_key = dict(
+                (getattr(obj, target_field.attname), obj) for obj in lookup_objs)
+            queryset = queryset.values_list(fk_field, 'group__slug', 'position')
+            for batch in _batches(objs_by_key, queryset.db):
+                rows = queryset.filter(**{'%s__in' % fk_field: batch})
+                for fk_val, slug, position in rows:
+                    obj = objs_by_key[target_field.to_python(fk_val)]
+                    result[obj].append((slug, position))
+        for groups in result.values():
+            groups.sort()
+        return result
+
+    def _resolved_chunks(self, chunk_size):
+        from .prefetch import resolve_targets
+        iterator = self.iterator(chunk_size=chunk_size)
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                return
+            resolve_targets(chunk)
+            yield chunk
+
+    def resolved(self, chunk_size=100):
+        """
+        Iterate over the items in the current queryset, fetched in chunks of
+        ``chunk_size``. The related objects of each chunk are loaded with one
+        query per related model (per content type, for a
+        CuratedGenericForeignKey), so reading proxied attributes of the items
+        runs no queries.
+        """
+        for chunk in self._resolved_chunks(chunk_size):
+            for item in chunk:
+                yield item
+
+    async def aresolved(self, chunk_size=100):
+        """
+        Async version of resolved(), for use with ``async for``. Each chunk is
+        fetched and resolved in a single sync_to_async() call. Requires
+        Django 3.1 or later.
+        """
+        from asgiref.sync import sync_to_async
+        chunks = self._resolved_chunks(chunk_size)
+        next_chunk = sync_to_async(next)
+        try:
+            while True:
+                chunk = await next_chunk(chunks, None)
+                if chunk is None:
+                    return
+                for item in chunk:
+                    yield item
+        finally:
+            await sync_to_async(chunks.close)()
+
+
+class CuratedItemManager(models.Manager.from_queryset(CuratedItemQuerySet)):
+    """A manager that defines queryset helpers for CuratedItem."""
+
+
+def _emit_getattr_event(name, start, item, attr):
+    instrumentation.emit(name, perf_counter() - start, model=type(item), attr=attr)
+
 
 class CuratedItem(models.Model, metaclass=CuratedItemModelBase):
     """
@@ -57,6 +313,27 @@ class CuratedItem(models.Model, metaclass=CuratedItemModelBase):
     #: proxy model.
     field_overrides = {}
 
+    #: If True, values resolved by ``__getattr__`` (through field_overrides
+    #: or the curated field) are memoized on the instance, so that repeated
+    #: reads of the same attribute, e.g. in templates, are a dict lookup.
+    #: The memo is cleared when the curated field, its content type / object
+    #: id fields, or any field in field_overrides is assigned. Changes made
+    #: directly to the related object are not seen until
+    #: ``clear_proxied_values()`` is called.
+    cache_proxied_values = False
+
+    #: An optional sequence of the names of the attributes of the related
+    #: model(s) that are read through this model, e.g.::
+    #:
+    #:     proxy_fields = ('title', 'slug', 'image')
+    #:
+    #: If set, related objects are loaded by the curated field descriptors
+    #: (and by prefetches of the curated field) with ``only()`` the concrete
+    #: fields named here and in the keys of field_overrides, so that large
+    #: columns aren't transferred. Other fields are still proxied, but are
+    #: loaded on first access, as with any deferred field.
+    proxy_fields = None
+
     #: Custom Primary Key
     primary_id = models.AutoField(primary_key=True, db_column='id')
 
@@ -82,18 +359,39 @@ class CuratedItem(models.Model, metaclass=CuratedItemModelBase):
            If attr is in self._proxy_attrs, return the value for that
            attribute in the proxy field.
         3. If the CuratedRelatedField on the model is not a
-           CuratedGenericForeignKey, check if the attr is in
-           self._meta._proxy_attrs. If so, return the value for that attribute
+           CuratedGenericForeignKey, check if the attr is in the
+           _proxy_attrs of the related model's _meta (found without loading
+           the related object). If so, return the value for that attribute
            in the proxy field.
+
+        Names found not to be proxied are remembered per related model in
+        self._meta._missing_proxy_attrs, so that repeated misses (from
+        hasattr() checks, template variable resolution, etc.) raise
+        AttributeError without calling the curated field descriptor.
         """
 
+        start = instrumentation.enabled and perf_counter()
+
+        if self.cache_proxied_values:
+            try:
+                value = self.__dict__['_proxied_values'][attr]
+            except KeyError:
+                pass
+            else:
+                if start:
+                    _emit_getattr_event('proxied_read', start, self, attr)
+                return value
+
         # We would get an infinite loop if self.field_overrides[attr] == attr
         if attr in self.field_overrides and self.field_overrides[attr] != attr:
             val = getattr(self, self.field_overrides[attr])
             if val or isinstance(val, bool):
-                return val
+                if start:
+                    _emit_getattr_event('proxied_read', start, self, attr)
+                return self._remember_proxied_value(attr, val)
 
         proxy_attrs = []
+        proxy_model = None
 
         opts = self._meta
 
@@ -108,6 +406,13 @@ class CuratedItem(models.Model, metaclass=CuratedItemModelBase):
             except KeyError:
                 pass
         elif is_generic_curated_field:
+            proxy_model = self.__dict__.get('_proxy_model')
+            if proxy_model is not None:
+                missing_attrs = opts._missing_proxy_attrs.get(proxy_model)
+                if missing_attrs and attr in missing_attrs:
+                    if start:
+                        _emit_getattr_event('proxied_miss', start, self, attr)
+                    raise AttributeError(missing_attrs[attr])
             try:
                 proxy_attrs = self.__dict__['_proxy_attrs']
             except KeyError:
@@ -115,8 +420,17 @@ class CuratedItem(models.Model, metaclass=CuratedItemModelBase):
                 # populates _proxy_attrs by calling contribute_to_instance()
                 self.__getattribute__(curated_field_name)
                 proxy_attrs = self.__dict__.get('_proxy_attrs', [])
+                proxy_model = self.__dict__.get('_proxy_model')
         else:
-            proxy_attrs = getattr(getattr(self, curated_field_name)._meta, '_proxy_attrs', [])
+            proxy_model = getattr(opts, '_curated_proxy_model', None)
+            if proxy_model is None:
+                proxy_model = getattr(self, curated_field_name).__class__
+            missing_attrs = opts._missing_proxy_attrs.get(proxy_model)
+            if missing_attrs and attr in missing_attrs:
+                if start:
+                    _emit_getattr_event('proxied_miss', start, self, attr)
+                raise AttributeError(missing_attrs[attr])
+            proxy_attrs = getattr(proxy_model._meta, '_proxy_attrs', [])
 
         if attr in proxy_attrs:
             try:
@@ -125,17 +439,19 @@ class CuratedItem(models.Model, metaclass=CuratedItemModelBase):
                 raise
             else:
                 try:
-                    return getattr(item, attr)
+                    value = self._remember_proxied_value(attr, getattr(item, attr))
+                    if start:
+                        _emit_getattr_event('proxied_read', start, self, attr)
+                    return value
                 except AttributeError:
-                    if is_generic_curated_field is not None:
+                    if is_generic_curated_field and item is None:
                         if getattr(self, '_proxy_model', None) is not None:
                             opts = self._meta
                             proxy_opts = self._proxy_model._meta
-                            curated_field = [f for f in opts.virtual_fields
-                                             if f.name == curated_field_name][0]
+                            curated_field = opts.get_field(curated_field_name)
                             fk = getattr(self, curated_field.fk_field)
                             if fk:
-                                fk_str = " and pk=%d" % fk
+                                fk_str = " and pk=%s" % fk
                             else:
                                 fk_str = ""
 
@@ -151,5 +467,178 @@ class CuratedItem(models.Model, metaclass=CuratedItemModelBase):
                                     "model_name": self._meta.object_name,
                                     "fk_str": fk_str})
 
-        raise AttributeError("'%s' object has no attribute '%s'" %
-            (self.__class__.__name__, attr))
+        msg = "'%s' object has no attribute '%s'" % (self.__class__.__name__, attr)
+        if proxy_model is not None and attr not in proxy_attrs:
+            # Remember that attr isn't proxied for this related model, so that
+            # the next lookup (e.g. from hasattr() or a template variable)
+            # fails without touching the curated field descriptor.
+            opts._missing_proxy_attrs.setdefault(proxy_model, {})[attr] = msg
+        if start:
+            _emit_getattr_event('proxied_miss', start, self, attr)
+        raise AttributeError(msg)
+
+    def _remember_proxied_value(self, attr, value):
+        if self.cache_proxied_values:
+            self.__dict__.setdefault('_proxied_values', {})[attr] = value
+        return value
+
+    def _setattr_clearing_proxied_values(self, name, value):
+        """
+        Installed as ``__setattr__`` by CuratedItemModelBase on models that
+        set ``cache_proxied_values = True``, and inherited by their subclasses,
+        which may set it back to False.
+        """
+        super(CuratedItem, self).__setattr__(name, value)
+        if name in getattr(self._meta, '_proxied_value_dependencies', ()):
+            self.__dict__.pop('_proxied_values', None)
+
+    @classmethod
+    def get_group_field(cls):
+        """
+        Return the ``group`` ForeignKey to a CuratedGroup model, by the
+        convention that curated items have one, or None.
+        """
+        opts = cls._meta
+        try:
+            return opts._curated_group_field
+        except AttributeError:
+            pass
+        try:
+            field = opts.get_field('group')
+        except FieldDoesNotExist:
+            field = None
+        if field is not None and not (
+                field.many_to_one and issubclass(field.related_model, CuratedGroup)):
+            field = None
+        opts._curated_group_field = field
+        return field
+
+    @classmethod
+    def group_has_counters(cls):
+        """
+        Return True if the item's group model includes CuratedGroupCounters.
+        """
+        opts = cls._meta
+        try:
+            return opts._curated_group_counters
+        except AttributeError:
+            pass
+        field = cls.get_group_field()
+        opts._curated_group_counters = field is not None and issubclass(
+            field.related_model, CuratedGroupCounters)
+        return opts._curated_group_counters
+
+    @classmethod
+    def group_has_version(cls):
+        """
+        Return True if the item's group model includes CuratedGroupVersion.
+        """
+        opts = cls._meta
+        try:
+            return opts._curated_group_version
+        except AttributeError:
+            pass
+        field = cls.get_group_field()
+        opts._curated_group_version = field is not None and issubclass(
+            field.related_model, CuratedGroupVersion)
+        return opts._curated_group_version
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(CuratedItem, cls).from_db(db, field_names, values)
+        if cls.group_has_counters():
+            instance.store_group_position()
+        return instance
+
+    def store_group_position(self):
+        """
+        Remember the group and position of the item as stored in the
+        database, to adjust the counters of its group(s) by when it's saved.
+        """
+        attname = self.get_group_field().attname
+        if attname in self.__dict__ and 'position' in self.__dict__:
+            self.__dict__['_stored_group_position'] = (
+                self.__dict__[attname], self.__dict__['position'])
+        else:
+            self.__dict__.pop('_stored_group_position', None)
+
+    def update_group(self, group_id=None, **updates):
+        """
+        Apply ``updates`` to the item's group (or to the group with pk
+        ``group_id``), if it has one, in an UPDATE that also increments its
+        version if it includes CuratedGroupVersion.
+        """
+        field = self.get_group_field()
+        if group_id is None:
+            group_id = field and getattr(self, field.attname)
+        if group_id is None:
+            return
+        has_version = self.group_has_version()
+        if has_version:
+            updates['version'] = models.F('version') + 1
+        if updates:
+            field.related_model._base_manager.using(self._state.db).filter(
+                pk=group_id).update(**updates)
+        if has_version:
+            invalidate_group_version(field.related_model, group_id, self._state.db)
+
+    def update_group_counters(self, adding):
+        """
+        Adjust the counters of the item's group (and bump its version, if it
+        has one) after the item was saved (inserted, if ``adding``).
+        """
+        from . import counters
+
+        group_model = self.get_group_field().related_model
+        group_id = getattr(self, self.get_group_field().attname)
+        stored = None if adding else self.__dict__.get('_stored_group_position')
+        if adding or (stored is not None and stored[0] != group_id):
+            if stored is not None and stored[0] is not None:
+                self.update_group(stored[0], **counters.removed_item_updates(group_model))
+            if group_id is not None:
+                self.update_group(**counters.added_item_updates(self.position))
+        elif stored is not None:
+            self.update_group(**counters.moved_item_updates(
+                group_model, stored[1], self.position))
+        else:
+            # Not loaded from the database with its group and position
+            self.update_group(**counters.recount_updates(group_model))
+        self.store_group_position()
+
+    def save(self, *args, **kwargs):
+        # Set by the curated admin formsets, which bump the version of the
+        # group once for all of the items they save
+        skip_update = self.__dict__.pop('_skip_group_update', False)
+        if skip_update or not (self.group_has_version() or self.group_has_counters()):
+            return super(CuratedItem, self).save(*args, **kwargs)
+        adding = self._state.adding
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super(CuratedItem, self).save(*args, **kwargs)
+            if self.group_has_counters():
+                self.update_group_counters(adding)
+            else:
+                self.update_group()
+
+    save.alters_data = True
+
+    def delete(self, *args, **kwargs):
+        if not (self.group_has_version() or self.group_has_counters()):
+            return super(CuratedItem, self).delete(*args, **kwargs)
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            result = super(CuratedItem, self).delete(*args, **kwargs)
+            if self.group_has_counters():
+                from .counters import removed_item_updates
+                self.update_group(
+                    **removed_item_updates(self.get_group_field().related_model))
+                self.__dict__.pop('_stored_group_position', None)
+            else:
+                self.update_group()
+        return result
+
+    delete.alters_data = True
+
+    def clear_proxied_values(self):
+        """Clear the memo of values kept when ``cache_proxied_values`` is True."""
+        self.__dict__.pop('_proxied_values', None)
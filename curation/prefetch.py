@@ -0,0 +1,81 @@
+"""
+Helpers for loading the related objects of many curated items at once, with
+one query per related model (i.e. per content type) rather than one query per
+item.
+"""
+from django.db import connections
+from django.db.models import prefetch_related_objects
+
+
+def _batches(pks, using):
+    """
+    Split ``pks`` into batches small enough for the query parameter limit of
+    the database ``using`` (e.g. SQLite's), if it has one.
+    """
+    pks = tuple(pks)
+    batch_size = connections[using].features.max_query_params
+    if not batch_size or len(pks) <= batch_size:
+        yield pks
+        return
+    for offset in range(0, len(pks), batch_size):
+        yield pks[offset:offset + batch_size]
+
+
+def get_target_values(model_cls, keys, using, fields, key_field=None):
+    """
+    Return a dict mapping each value in ``keys`` of the pk of ``model_cls``
+    (or of ``key_field``, e.g. the to_field of a ForeignKey) that exists to a
+    tuple of the values of ``fields`` (attnames of concrete fields of
+    ``model_cls``, including that of the key field) for that row.
+    """
+    if key_field is None:
+        key_field = model_cls._meta.pk
+    key_index = list(fields).index(key_field.attname)
+    qs = model_cls._base_manager.using(using).order_by().values_list(*fields)
+    values = {}
+    for batch in _batches(keys, using):
+        for row in qs.filter(**{'%s__in' % key_field.name: batch}):
+            values[row[key_index]] = row
+    return values
+
+
+def resolve_targets(instances):
+    """
+    Load the related objects of the curated field of ``instances`` (a list of
+    instances of one CuratedItem model) and cache them on the instances, so
+    that reading the curated field or proxied attributes of the instances
+    runs no queries.
+    """
+    if not instances:
+        return
+    opts = instances[0]._meta
+    field = opts.get_field(opts._curated_proxy_field_name)
+    if getattr(opts, '_curated_field_is_generic', False):
+        field.cache_related_objects(instances)
+    else:
+        prefetch_related_objects(instances, field.name)
+
+
+def with_curated_targets(queryset):
+    """
+    Return ``queryset`` (of a CuratedItem model) set to load the related
+    objects of its curated field: with ``select_related()`` for a
+    CuratedForeignKey, or ``prefetch_related()``, with one query per content
+    type, for a CuratedGenericForeignKey.
+
+    Either way the related objects are loaded with only the fields in the
+    item model's ``proxy_fields``, if it defines them, as by the curated
+    field's descriptor. With ``select_related()``, that is done with
+    ``only()``, unless ``queryset`` already defers fields.
+    """
+    opts = queryset.model._meta
+    field_name = opts._curated_proxy_field_name
+    if getattr(opts, '_curated_field_is_generic', False):
+        return queryset.prefetch_related(field_name)
+    queryset = queryset.select_related(field_name)
+    field = opts.get_field(field_name)
+    only_fields = field.get_proxy_only_fields(field.related_model)
+    if only_fields is None or queryset.query.deferred_loading[0]:
+        return queryset
+    return queryset.only(*[f.name for f in opts.concrete_fields] + [
+        '%s__%s' % (field_name, name) for name in only_fields])
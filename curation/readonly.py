@@ -0,0 +1,223 @@
+"""
+Read-only views of curated items built from ``values_list()`` queries, for
+rendering large groups (in feeds, APIs, etc.) without the cost of creating a
+model instance (and running the post_init signal handlers) for every item and
+its related object.
+"""
+import inspect
+from collections import defaultdict
+from functools import partialmethod
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.db.models.base import DEFERRED
+from django.utils.functional import cached_property
+
+from .generic import get_target_meta
+from .prefetch import get_target_values
+
+
+class CuratedItemView(object):
+    """
+    A read-only stand-in for a CuratedItem instance.
+
+    Attribute lookups resolve the same way as on the model instance: fields
+    of the curated item first, then ``field_overrides``, then the attributes
+    of the related object that CuratedItem proxies. Field values are read
+    from the rows loaded by ``get_item_views()``; properties and methods of
+    the related object are read from an instance of it, built from its row
+    the first time one is accessed.
+
+    Not covered: fields of the related object left out by the item model's
+    ``proxy_fields`` (which a CuratedItem loads on first access), the
+    related objects of its relations (which are exposed by their attname,
+    e.g. ``author_id``), and the properties and methods of the curated item
+    model itself.
+
+    Column name to index maps are shared by every view created by the same
+    call to ``get_item_views()``, so each view only holds a reference to its
+    item row and related object row.
+    """
+
+    __slots__ = ('_model', '_columns', '_row', '_target_layout', '_target_row', '_target')
+
+    def __init__(self, model, columns, row, target_layout, target_row):
+        self._model = model
+        self._columns = columns
+        self._row = row
+        self._target_layout = target_layout
+        self._target_row = target_row
+        self._target = None
+
+    def __getattr__(self, attr):
+        try:
+            return self._row[self._columns[attr]]
+        except KeyError:
+            pass
+
+        field_overrides = self._model.field_overrides
+        # We would get an infinite loop if field_overrides[attr] == attr
+        if attr in field_overrides and field_overrides[attr] != attr:
+            val = getattr(self, field_overrides[attr], None)
+            if val or isinstance(val, bool):
+                return val
+
+        if self._target_row is not None:
+            layout = self._target_layout
+            try:
+                return self._target_row[layout.columns[attr]]
+            except KeyError:
+                pass
+            if attr in layout.class_attrs:
+                if self._target is None:
+                    self._target = layout.build_instance(self._target_row)
+                return getattr(self._target, attr)
+
+        raise AttributeError("'%s' object has no attribute '%s'" % (
+            type(self).__name__, attr))
+
+    def __repr__(self):
+        return '<%s: %s.%s pk=%r>' % (
+            type(self).__name__, self._model._meta.app_label,
+            self._model._meta.object_name, self.pk)
+
+
+class TargetLayout(object):
+    """
+    The columns of the rows loaded for the related objects of one model,
+    shared by the views of the items pointing to them.
+    """
+
+    def __init__(self, model, using, attnames, columns):
+        self.model = model
+        self.using = using
+        self.attnames = attnames
+        self.columns = columns
+        self.class_attrs = get_class_attrs(model)
+
+    def build_instance(self, row):
+        """Return an instance of the related model built from ``row``."""
+        values = dict(zip(self.attnames, row))
+        return self.model.from_db(self.using, self.attnames, [
+            values.get(f.attname, DEFERRED) for f in self.model._meta.concrete_fields])
+
+
+def get_class_attrs(model_cls):
+    """
+    Return the set of the names of the properties and methods of
+    ``model_cls`` and its parent classes (besides Model), which CuratedItem
+    proxies along with its fields.
+    """
+    names = set()
+    for parent_cls in model_cls.__mro__:
+        if parent_cls in (object, models.Model):
+            continue
+        for name, value in vars(parent_cls).items():
+            if name.startswith('__'):
+                continue
+            if inspect.isfunction(value) or isinstance(value, (
+                    property, cached_property, partialmethod, classmethod, staticmethod)):
+                names.add(name)
+    return names
+
+
+def get_columns(model_cls, exclude=(), only=None):
+    """
+    Return a list of the concrete field attnames of ``model_cls`` (pk first)
+    and a dict mapping attribute names to their index in that list.
+
+    If ``only`` is given, it is a list of the names of the fields to include
+    besides the pk.
+    """
+    opts = model_cls._meta
+    fields = [opts.pk] + [f for f in opts.concrete_fields if f is not opts.pk and (
+        only is None or f.name in only)]
+    attnames = [f.attname for f in fields]
+    columns = {'pk': 0}
+    for i, f in enumerate(fields):
+        if f.name in exclude:
+            continue
+        columns[f.attname] = i
+        if not f.is_relation:
+            columns[f.name] = i
+    return attnames, columns
+
+
+def get_item_views(queryset):
+    """
+    Evaluate ``queryset`` (of a CuratedItem subclass) and return a list of
+    CuratedItemView objects, running one query for the items and one query
+    per related model.
+    """
+    model = queryset.model
+    opts = model._meta
+    using = queryset.db
+    curated_field_name = opts._curated_proxy_field_name
+    curated_field = opts.get_field(curated_field_name)
+    is_generic = opts._curated_field_is_generic
+
+    attnames, columns = get_columns(model)
+    rows = list(queryset.values_list(*attnames))
+
+    if is_generic:
+        ct_index = attnames.index(opts.get_field(curated_field.ct_field).attname)
+        fk_index = attnames.index(curated_field.fk_field)
+    else:
+        ct_index = None
+        fk_index = attnames.index(curated_field.attname)
+        target_model = curated_field.remote_field.model
+
+    # Collect the related object keys, grouped by related model
+    target_models = {}
+    target_keys = defaultdict(set)
+    for row in rows:
+        fk_val = row[fk_index]
+        if fk_val is None:
+            continue
+        if is_generic:
+            ct_id = row[ct_index]
+            if ct_id is None:
+                continue
+            try:
+                target_model = target_models[ct_id]
+            except KeyError:
+                ct = ContentType.objects.db_manager(using).get_for_id(ct_id)
+                target_model = target_models[ct_id] = ct.model_class()
+            if target_model is None:
+                continue
+        target_keys[target_model].add(fk_val)
+
+    target_layouts = {}
+    target_values = {}
+    key_to_python = {}
+    for model_cls, keys in target_keys.items():
+        if is_generic or curated_field.target_field.primary_key:
+            key_field = model_cls._meta.pk
+            to_python = get_target_meta(model_cls, using)[1]
+        else:
+            # The values of a ForeignKey with a to_field aren't pks
+            key_field = curated_field.target_field
+            to_python = key_field.to_python
+        exclude = (curated_field_name,) if is_generic else ()
+        only_fields = curated_field.get_proxy_only_fields(model_cls)
+        target_attnames, target_columns = get_columns(
+            model_cls, exclude=exclude, only=only_fields)
+        target_layouts[model_cls] = TargetLayout(
+            model_cls, using, target_attnames, target_columns)
+        target_values[model_cls] = get_target_values(
+            model_cls, [to_python(key) for key in keys], using, target_attnames, key_field)
+        key_to_python[model_cls] = to_python
+
+    views = []
+    for row in rows:
+        target_row = None
+        target_layout = None
+        fk_val = row[fk_index]
+        if is_generic:
+            target_model = target_models.get(row[ct_index])
+        if fk_val is not None and target_model in target_values:
+            to_python = key_to_python[target_model]
+            target_row = target_values[target_model].get(to_python(fk_val))
+            target_layout = target_layouts[target_model]
+        views.append(CuratedItemView(model, columns, row, target_layout, target_row))
+    return views
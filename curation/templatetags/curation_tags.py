@@ -0,0 +1,124 @@
+"""
+Template tags for reading curated groups::
+
+    {% load curation_tags %}
+
+    {% curated_group "blog.CuratedPost" "homepage" as items %}
+    {% for item in items %}{{ item.title }}{% endfor %}
+
+loads the items of the group with the related objects of their curated field
+(with one query per related model), and::
+
+    {% cached_curated_group "blog.CuratedPost" "homepage" as items [vary_on ...] %}
+        {% for item in items %}{{ item.title }}{% endfor %}
+    {% endcached_curated_group %}
+
+caches the rendered block, keyed on the group's version (see curation.cache),
+the tag's position in its template, and any ``vary_on`` values, so that a
+cache hit runs no queries and the next render after a write to the group
+renders the new items. The items are read with
+curation.cache.get_group_items(), so with stale-while-revalidate enabled a
+write makes one caller reload the items while others render the stale ones.
+"""
+import hashlib
+
+from django import template
+from django.apps import apps
+
+from .. import cache as curation_cache
+
+
+register = template.Library()
+
+
+def get_item_model(model):
+    """
+    Return the CuratedItem model ``model``, given as a model class or an
+    'app_label.ModelName' string, which must have a ``group`` ForeignKey.
+    """
+    if isinstance(model, str):
+        try:
+            model = apps.get_model(model)
+        except (LookupError, ValueError) as e:
+            raise template.TemplateSyntaxError(str(e))
+    get_group_field = getattr(model, 'get_group_field', None)
+    if get_group_field is None or get_group_field() is None:
+        raise template.TemplateSyntaxError(
+            "%s is not a curated item model with a group" % model._meta.label)
+    return model
+
+
+@register.simple_tag
+def curated_group(model, slug):
+    return curation_cache.load_group_items(get_item_model(model), slug)
+
+
+class CachedCuratedGroupNode(template.Node):
+
+    def __init__(self, nodelist, model, slug, asvar, vary_on, index):
+        self.nodelist = nodelist
+        self.model = model
+        self.slug = slug
+        self.asvar = asvar
+        self.vary_on = vary_on
+        #: The number of cached_curated_group blocks before this one in the
+        #: template, telling apart blocks on the same line
+        self.index = index
+
+    def get_fragment_key(self, context, item_model, group_pk, version):
+        # Token.position is only set when the template engine is in debug mode
+        parts = [getattr(self.origin, 'name', None), self.token.lineno, self.index]
+        parts.extend(var.resolve(context) for var in self.vary_on)
+        fragment = hashlib.md5(repr(parts).encode('utf-8')).hexdigest()
+        return 'curation.fragment:%s:%s:%s:%s' % (
+            item_model._meta.label_lower, group_pk, version, fragment)
+
+    def render(self, context):
+        item_model = get_item_model(self.model.resolve(context))
+        slug = self.slug.resolve(context)
+        group_model = item_model.get_group_field().related_model
+        row = curation_cache.get_group_pk_version(group_model, slug)
+        entry = None
+        if row is not None:
+            group_pk, version = row
+            cache = curation_cache.get_cache()
+            key = self.get_fragment_key(context, item_model, group_pk, version)
+            content = cache.get(key)
+            if content is not None:
+                return content
+            entry = curation_cache.get_group_entry(item_model, slug)
+        if entry is None:
+            with context.push(**{self.asvar: []}):
+                return self.nodelist.render(context)
+        # Stale items (see curation.cache.get_group_entry()) are rendered and
+        # cached under the version they were loaded at
+        items_version, items = entry
+        if items_version != version:
+            key = self.get_fragment_key(context, item_model, group_pk, items_version)
+            content = cache.get(key)
+            if content is not None:
+                return content
+        with context.push(**{self.asvar: items}):
+            content = self.nodelist.render(context)
+        cache.set(key, content, curation_cache.get_timeout())
+        return content
+
+
+@register.tag
+def cached_curated_group(parser, token):
+    bits = token.split_contents()
+    if len(bits) < 5 or bits[3] != 'as':
+        raise template.TemplateSyntaxError(
+            "'%s' takes the form {%% %s model slug as var [vary_on ...] %%}" % (
+                bits[0], bits[0]))
+    index = getattr(parser, '_cached_curated_groups', 0)
+    parser._cached_curated_groups = index + 1
+    nodelist = parser.parse(('endcached_curated_group',))
+    parser.delete_first_token()
+    return CachedCuratedGroupNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        parser.compile_filter(bits[2]),
+        bits[4],
+        [parser.compile_filter(bit) for bit in bits[5:]],
+        index)
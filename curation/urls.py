@@ -1,8 +1,11 @@
 import functools
+
+from django.conf import settings
 from django.contrib import admin
 from django.conf.urls import url
 
 from . import views as curation_views
+from .views.groups import group_json
 
 
 def wrap(view, cacheable=False):
@@ -14,14 +17,38 @@ def wrap(view, cacheable=False):
     return functools.update_wrapper(wrapper, view)
 
 
+def use_async_views():
+    """
+    Whether to route to the async views in curation.views.async_views: the
+    value of the CURATION_ASYNC_VIEWS setting, which defaults to False. The
+    async views require Django 3.1 or later.
+    """
+    return bool(getattr(settings, 'CURATION_ASYNC_VIEWS', False))
+
+
+if use_async_views():
+    from .views import async_views
+
+    get_content_types_view = async_views.async_admin_view(async_views.get_content_types)
+    related_lookup_view = async_views.async_admin_view(async_views.related_lookup)
+    shortcut_view = async_views.async_admin_view(async_views.shortcut)
+else:
+    get_content_types_view = wrap(curation_views.get_content_types)
+    related_lookup_view = wrap(curation_views.related_lookup)
+    shortcut_view = wrap(curation_views.shortcut)
+
+
 urlpatterns = [
     url(r'^content-type-list\.js$',
-        wrap(curation_views.get_content_types),  # 'curation.views.get_content_types',
+        get_content_types_view,  # 'curation.views.get_content_types',
         name="curation_content_type_list"),
     url(r'^lookup/related/$',
-        wrap(curation_views.related_lookup),  # 'curation.views.related_lookup',
+        related_lookup_view,  # 'curation.views.related_lookup',
         name="curation_related_lookup"),
     url(r'^r/(?P<content_type_id>\d+)/(?P<object_id>.+)/$',
-        wrap(curation_views.shortcut),
+        shortcut_view,
         name="curation_shortcut"),
+    url(r'^groups/(?P<model>\w+\.\w+)/(?P<slug>[-\w]+)\.json$',
+        group_json,
+        name="curation_group_json"),
 ]
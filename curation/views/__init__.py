@@ -49,8 +49,12 @@ def get_common_field_values(curated_item_cls, fk_obj):
     return fk_data
 
 
-def get_curated_item_for_request(request):
-    data = {}
+def get_related_lookup_params(request):
+    """
+    Parse and validate the query string of a related_lookup request. Returns
+    a tuple of (app_label, model_name, ct_field, fk_field, object_id,
+    model_ct_id), or None if the request is invalid.
+    """
     app_label = request.GET.get('app_label')
     model_name = request.GET.get('model_name')
     try:
@@ -65,6 +69,15 @@ def get_curated_item_for_request(request):
         model_ct_id = int(request.GET.get('ct_id'))
     except (TypeError, ValueError):
         return None
+    return app_label, model_name, ct_field, fk_field, object_id, model_ct_id
+
+
+def get_curated_item_for_request(request):
+    data = {}
+    params = get_related_lookup_params(request)
+    if params is None:
+        return None
+    app_label, model_name, ct_field, fk_field, object_id, model_ct_id = params
 
     ct_model_cls = apps.get_model(app_label, model_name)
     if ct_model_cls is None:
@@ -118,12 +131,16 @@ def empty_json(obj):
     return None
 
 
+related_lookup_required_params = (
+    'app_label', 'model_name', 'object_id', 'ct_field', 'fk_field', 'ct_id',)
+
+
 @never_cache
 def related_lookup(request):
     if not (request.user.is_active and request.user.is_staff):
         return HttpResponseForbidden('<h1>Permission denied</h1>')
     data = []
-    required_params = ('app_label', 'model_name', 'object_id', 'ct_field', 'fk_field', 'ct_id',)
+    required_params = related_lookup_required_params
 
     if request.method == 'GET':
         if all([request.GET.get(k) for k in required_params]):
@@ -146,7 +163,31 @@ def get_content_types(request):
     if not (request.user.is_active and request.user.is_staff):
         return HttpResponseForbidden('"Permission denied"')
 
-    global content_types, related_lookup_url, shortcut_url
+    if content_types is None:
+        load_content_types(ct_vals)
+    return render_content_types(request)
+
+
+def load_content_types(ct_rows):
+    """
+    Populate the module-level cache of content types (and their admin
+    changelist urls) from ``ct_rows``, an iterable of dicts with 'pk',
+    'app_label' and 'model' keys.
+    """
+    global content_types
+    cts = {}
+    for ct in ct_rows:
+        try:
+            ct['changelist'] = reverse(
+                'admin:%s_%s_changelist' % (ct['app_label'], ct['model']))
+        except NoReverseMatch:
+            pass
+        cts[ct['pk']] = ct
+    content_types = cts
+
+
+def render_content_types(request):
+    global related_lookup_url, shortcut_url
 
     if related_lookup_url is None:
         related_lookup_url = reverse('curation_related_lookup')
@@ -157,16 +198,6 @@ def get_content_types(request):
             'object_id': 0,
         }).replace('/0/0', '/{0}/{1}')
 
-    if content_types is None:
-        content_types = {}
-        for ct in ct_vals:
-            try:
-                ct['changelist'] = reverse(
-                    'admin:%s_%s_changelist' % (ct['app_label'], ct['model']))
-            except NoReverseMatch:
-                pass
-            content_types[ct['pk']] = ct
-
     ct_js = textwrap.dedent(r"""
         var DJCURATION = (typeof window.DJCURATION != "undefined")
                        ? DJCURATION : {};
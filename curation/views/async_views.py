@@ -0,0 +1,147 @@
+"""
+Async versions of the views in curation.views, for ASGI deployments. Their
+queries use the async ORM (on Django 4.1+), so lookups in the admin don't
+each tie up a thread from the sync thread pool for the whole request.
+
+Requires Django 3.1 or later. curation.urls routes to these views in place of
+the sync ones when the CURATION_ASYNC_VIEWS setting is True; see
+curation.urls.use_async_views().
+"""
+import json
+from functools import update_wrapper
+
+from asgiref.sync import sync_to_async
+
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import router
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.urls import reverse
+from django.utils.cache import add_never_cache_headers
+from django.utils.translation import gettext as _
+
+from .. import views
+from ..async_utils import aget, alist
+from .contenttypes import get_object_redirect
+
+
+def _load_user(request):
+    user = request.user
+    # Force evaluation of the lazy object while we're in a sync thread
+    user.is_active
+    return user
+
+
+async def is_active_staff(request):
+    if hasattr(request, 'auser'):
+        user = await request.auser()
+    else:
+        user = await sync_to_async(_load_user)(request)
+    return user.is_active and user.is_staff
+
+
+def async_admin_view(view):
+    """
+    The async equivalent of AdminSite.admin_view() (for views that only
+    respond to GET requests, so without csrf_protect()). Redirects users who
+    aren't active staff to the admin login, and marks responses as never
+    cacheable.
+    """
+    async def inner(request, *args, **kwargs):
+        if not await is_active_staff(request):
+            # Inner import to prevent django.contrib.admin (app) from
+            # importing django.contrib.auth.models.User (unrelated model).
+            from django.contrib.auth.views import redirect_to_login
+            return redirect_to_login(request.get_full_path(), reverse('admin:login'))
+        response = await view(request, *args, **kwargs)
+        add_never_cache_headers(response)
+        return response
+    return update_wrapper(inner, view)
+
+
+def _get_lookup_content_types(ct_model_cls, model_ct_id):
+    return (ContentType.objects.get_for_model(ct_model_cls, False),
+            ContentType.objects.get_for_id(model_ct_id))
+
+
+def _get_lookup_data(model_cls, obj):
+    return {
+        "fk": views.get_common_field_values(model_cls, obj),
+        "value": obj.pk,
+        "label": views.get_label(obj),
+    }
+
+
+async def get_curated_item_for_request(request):
+    params = views.get_related_lookup_params(request)
+    if params is None:
+        return None
+    app_label, model_name, ct_field, fk_field, object_id, model_ct_id = params
+
+    ct_model_cls = apps.get_model(app_label, model_name)
+    if ct_model_cls is None:
+        return {}
+    try:
+        ct, model_content_type = await sync_to_async(_get_lookup_content_types)(
+            ct_model_cls, model_ct_id)
+    except ContentType.DoesNotExist:
+        return None
+
+    model_cls = model_content_type.model_class()
+    if getattr(model_cls._meta, '_curated_proxy_field_name', None) is None:
+        return None
+
+    try:
+        obj = await aget(ct_model_cls.objects, pk=object_id)
+    except ct_model_cls.DoesNotExist:
+        return None
+    # obj is the object the curated field of a model_cls instance with
+    # ct_field=ct and fk_field=object_id would load, so its values are used
+    # for "fk" rather than loading it a second time.
+    return [await sync_to_async(_get_lookup_data)(model_cls, obj)]
+
+
+async def related_lookup(request):
+    if not await is_active_staff(request):
+        return HttpResponseForbidden('<h1>Permission denied</h1>')
+
+    if request.method == 'GET':
+        if all([request.GET.get(k) for k in views.related_lookup_required_params]):
+            data = await get_curated_item_for_request(request)
+            if data is not None:
+                return HttpResponse(json.dumps(data, default=views.empty_json),
+                    content_type='application/javascript')
+
+    data = [{"value": None, "label": ""}]
+    return HttpResponse(json.dumps(data),
+        content_type='application/javascript')
+
+
+async def get_content_types(request):
+    if not await is_active_staff(request):
+        return HttpResponseForbidden('"Permission denied"')
+
+    if views.content_types is None:
+        views.load_content_types(
+            await alist(ContentType.objects.all().values('pk', 'app_label', 'model')))
+    return views.render_content_types(request)
+
+
+async def shortcut(request, content_type_id, object_id):
+    """
+    Redirect to an object's page based on a content-type ID and an object ID.
+    """
+    try:
+        content_type = await aget(ContentType.objects, pk=content_type_id)
+        model_cls = content_type.model_class()
+        if not model_cls:
+            raise Http404(_(u"Content type %(ct_id)s object has no associated model") %
+                          {'ct_id': content_type_id})
+        using = router.db_for_read(model_cls)
+        obj = await aget(model_cls._base_manager.using(using), pk=object_id)
+    except (ObjectDoesNotExist, ValueError):
+        raise Http404(_(u"Content type %(ct_id)s object %(obj_id)s doesn't exist") %
+                      {'ct_id': content_type_id, 'obj_id': object_id})
+    # Introspecting the object's site may run queries on its relations
+    return await sync_to_async(get_object_redirect)(request, content_type, obj)
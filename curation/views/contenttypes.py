@@ -5,13 +5,15 @@ databases.
 
 The bug is that ContentType.objects.get_object_for_this_type() uses the wrong
 database for models which reside in a database other than the database with
-the django_content_type table.
+the django_content_type table. Objects are loaded from the database that the
+database routers' db_for_read() returns for their model instead.
 """
 
 from django import http
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.sites.models import Site
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import router
 from django.utils.translation import gettext as _
 from django.contrib.sites.shortcuts import get_current_site
 
@@ -23,14 +25,22 @@ def shortcut(request, content_type_id, object_id):
     # Look up the object, making sure it's got a get_absolute_url() function.
     try:
         content_type = ContentType.objects.get(pk=content_type_id)
-        if not content_type.model_class():
+        model_cls = content_type.model_class()
+        if not model_cls:
             raise http.Http404(_(u"Content type %(ct_id)s object has no associated model") %
                                {'ct_id': content_type_id})
-        obj = content_type.get_object_for_this_type(pk=object_id)
+        obj = model_cls._base_manager.using(router.db_for_read(model_cls)).get(pk=object_id)
     except (ObjectDoesNotExist, ValueError):
         raise http.Http404(_(u"Content type %(ct_id)s object %(obj_id)s doesn't exist") %
                            {'ct_id': content_type_id, 'obj_id': object_id})
+    return get_object_redirect(request, content_type, obj)
 
+
+def get_object_redirect(request, content_type, obj):
+    """
+    Return a redirect to the page of ``obj`` (of ContentType
+    ``content_type``), on the domain of its Site if it has a relation to one.
+    """
     try:
         get_absolute_url = obj.get_absolute_url
     except AttributeError:
@@ -54,7 +64,7 @@ def shortcut(request, content_type_id, object_id):
 
         # First, look for an many-to-many relationship to Site.
         for field in opts.many_to_many:
-            if field.rel.to is Site:
+            if field.remote_field.model is Site:
                 try:
                     # Caveat: In the case of multiple related Sites, this just
                     # selects the *first* one, which is arbitrary.
@@ -67,7 +77,7 @@ def shortcut(request, content_type_id, object_id):
         # Next, look for a many-to-one relationship to Site.
         if object_domain is None:
             for field in obj._meta.fields:
-                if field.rel and field.rel.to is Site:
+                if field.remote_field and field.remote_field.model is Site:
                     try:
                         object_domain = getattr(obj, field.name).domain
                     except Site.DoesNotExist:
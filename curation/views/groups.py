@@ -0,0 +1,89 @@
+"""
+A read-only JSON endpoint for curated groups, for the item models listed in
+the ``CURATION_JSON_MODELS`` setting (e.g. ``['blog.CuratedPost']``)::
+
+    GET /curation/groups/blog.curatedpost/homepage.json
+
+responds with the group's items, in the format of curation.export (with
+``field_overrides`` applied), as ``{"group": ..., "version": ...,
+"items": [...]}``. The response is streamed, with the related objects of each
+chunk of items loaded with one query per related model.
+
+The weak ETag of the response is computed from the group's version (read
+through curation.cache, so usually without a query), and a request whose
+``If-None-Match`` matches it gets a 304 without the items being loaded.
+"""
+import json
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_safe
+
+from .. import cache as curation_cache
+from ..export import export_items
+from ..models import CuratedItemQuerySet
+
+
+def get_json_model(label):
+    """
+    Return the item model with label ``label`` if it is listed in the
+    CURATION_JSON_MODELS setting, otherwise raise Http404.
+    """
+    allowed = set(m.lower() for m in getattr(settings, 'CURATION_JSON_MODELS', ()))
+    if label.lower() not in allowed:
+        raise Http404("%s is not served as JSON" % label)
+    try:
+        return apps.get_model(label)
+    except (LookupError, ValueError):
+        raise Http404("No model %s" % label)
+
+
+def get_group_etag(item_model, group_pk, version):
+    return 'W/"%s-%s-%s"' % (item_model._meta.label_lower, group_pk, version)
+
+
+def iter_group_json(item_model, slug, version, chunk_size=500):
+    queryset = CuratedItemQuerySet(item_model).group(slug)
+    yield '{"group": %s, "version": %d, "items": [' % (json.dumps(slug), version)
+    separator = ''
+    for record in export_items(queryset, chunk_size=chunk_size):
+        yield separator + json.dumps(record, cls=DjangoJSONEncoder, sort_keys=True)
+        separator = ', '
+    yield ']}'
+
+
+def can_stream(request):
+    """
+    Whether a response to ``request`` can be streamed by an iterator that
+    runs queries: the ASGI handler of Django < 4.2 iterates over streaming
+    responses in async code, where the ORM can't be used.
+    """
+    if django.VERSION >= (4, 2) or django.VERSION < (3, 0):
+        return True
+    from django.core.handlers.asgi import ASGIRequest
+    return not isinstance(request, ASGIRequest)
+
+
+@require_safe
+def group_json(request, model, slug):
+    item_model = get_json_model(model)
+    group_field = getattr(item_model, 'get_group_field', lambda: None)()
+    if group_field is None:
+        raise Http404("%s is not a curated item model with a group" % model)
+    row = curation_cache.get_group_pk_version(group_field.related_model, slug)
+    if row is None:
+        raise Http404("No group %s" % slug)
+    etag = get_group_etag(item_model, *row)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        content = iter_group_json(item_model, slug, row[1])
+        if can_stream(request):
+            response = StreamingHttpResponse(content, content_type='application/json')
+        else:
+            response = HttpResponse(''.join(content), content_type='application/json')
+    response['ETag'] = etag
+    return response
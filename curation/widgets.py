@@ -9,6 +9,12 @@ from django.utils.html import conditional_escape
 
 class SourceSelect(widgets.Select):
 
+    def __deepcopy__(self, memo):
+        obj = super(SourceSelect, self).__deepcopy__(memo)
+        # See ContentTypeChoiceField.__deepcopy__()
+        obj.choices = self.choices
+        return obj
+
     @property
     def media(self):
         media = super(SourceSelect, self).media
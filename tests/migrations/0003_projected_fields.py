@@ -0,0 +1,27 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0002_cachedhandler'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='body',
+            field=models.TextField(blank=True),
+        ),
+        migrations.CreateModel(
+            name='ProjectedHandler',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('tests.handler',),
+        ),
+    ]
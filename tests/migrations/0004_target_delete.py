@@ -0,0 +1,42 @@
+import curation.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('tests', '0003_projected_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NullingItem',
+            fields=[
+                ('primary_id', models.AutoField(db_column='id', primary_key=True, serialize=False)),
+                ('position', models.PositiveSmallIntegerField(verbose_name='Position')),
+                ('object_id', models.PositiveIntegerField(blank=True, null=True)),
+                ('source', models.CharField(blank=True, choices=[('post', 'Post'), ('moda', 'Model A')], max_length=8, null=True)),
+                ('content_type', curation.fields.ContentTypeSourceField(blank=True, choices=[({'class': 'curated-content-type-option', 'value': '14'}, 'Post'), ({'class': 'curated-content-type-option', 'value': '12'}, 'Model A')], null=True, on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'ordering': ['position'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='CascadingItem',
+            fields=[
+                ('primary_id', models.AutoField(db_column='id', primary_key=True, serialize=False)),
+                ('position', models.PositiveSmallIntegerField(verbose_name='Position')),
+                ('object_id', models.PositiveIntegerField()),
+                ('source', models.CharField(blank=True, choices=[('post', 'Post'), ('moda', 'Model A')], max_length=8, null=True)),
+                ('content_type', curation.fields.ContentTypeSourceField(choices=[({'class': 'curated-content-type-option', 'value': '14'}, 'Post'), ({'class': 'curated-content-type-option', 'value': '12'}, 'Model A')], on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype')),
+            ],
+            options={
+                'ordering': ['position'],
+                'abstract': False,
+            },
+        ),
+    ]
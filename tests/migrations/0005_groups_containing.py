@@ -0,0 +1,21 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0004_target_delete'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cascadingitem',
+            name='group',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='tests.curatedpostgroup'),
+        ),
+        migrations.AddIndex(
+            model_name='cascadingitem',
+            index=models.Index(fields=['content_type', 'object_id'], name='tests_casca_content_154a1e_idx'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0005_groups_containing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='curatedpostgroup',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,40 @@
+import curation.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0006_group_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CountedGroup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('slug', models.SlugField(help_text='Used for database slug', max_length=75, unique=True)),
+                ('version', models.PositiveIntegerField(default=0, editable=False)),
+                ('item_count', models.PositiveIntegerField(default=0, editable=False)),
+                ('max_position', models.IntegerField(editable=False, null=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='CountedItem',
+            fields=[
+                ('primary_id', models.AutoField(db_column='id', primary_key=True, serialize=False)),
+                ('position', models.PositiveSmallIntegerField(verbose_name='Position')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tests.countedgroup')),
+                ('target', curation.fields.CuratedForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tests.modelb')),
+            ],
+            options={
+                'ordering': ['position'],
+                'abstract': False,
+            },
+        ),
+    ]
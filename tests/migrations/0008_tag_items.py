@@ -0,0 +1,34 @@
+import curation.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0007_group_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slug', models.SlugField(unique=True)),
+                ('name', models.CharField(max_length=50)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TagItem',
+            fields=[
+                ('primary_id', models.AutoField(db_column='id', primary_key=True, serialize=False)),
+                ('position', models.PositiveSmallIntegerField(verbose_name='Position')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='tests.curatedpostgroup')),
+                ('tag', curation.fields.CuratedForeignKey(on_delete=django.db.models.deletion.CASCADE, to='tests.tag', to_field='slug')),
+            ],
+            options={
+                'ordering': ['position'],
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0008_tag_items'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagGroup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('slug', models.SlugField(help_text='Used for database slug', max_length=75, unique=True)),
+            ],
+            options={
+                'verbose_name': 'Curated Content',
+                'verbose_name_plural': 'Curated Content',
+                'abstract': False,
+            },
+        ),
+        migrations.RemoveField(
+            model_name='countedgroup',
+            name='version',
+        ),
+        migrations.AlterField(
+            model_name='tagitem',
+            name='group',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='tests.taggroup'),
+        ),
+    ]
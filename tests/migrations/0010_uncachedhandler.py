@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tests', '0009_optional_group_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UncachedHandler',
+            fields=[
+            ],
+            options={
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('tests.cachedhandler',),
+        ),
+    ]
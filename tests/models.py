@@ -1,6 +1,8 @@
 from django.db import models
 
-from curation.models import CuratedGroup, CuratedItem
+from curation import deletion
+from curation.models import (
+    CuratedGroup, CuratedGroupCounters, CuratedGroupVersion, CuratedItem, CuratedItemManager)
 from curation.fields import (
     CuratedForeignKey,
     ContentTypeSourceField,
@@ -10,12 +12,16 @@ from curation.fields import (
 
 class Post(models.Model):
     title = models.CharField(max_length=50)
+    body = models.TextField(blank=True)
 
     def __str__(self):
         return '[Post({})]'.format(self.id)
 
+    def get_absolute_url(self):
+        return '/posts/{}/'.format(self.id)
 
-class CuratedPostGroup(CuratedGroup):
+
+class CuratedPostGroup(CuratedGroupVersion, CuratedGroup):
     pass
 
 
@@ -23,6 +29,10 @@ class CuratedPostItem(CuratedItem):
     post = CuratedForeignKey(Post, on_delete=models.CASCADE)
     group = models.ForeignKey(CuratedPostGroup, on_delete=models.CASCADE)
 
+    objects = CuratedItemManager()
+
+    proxy_fields = ('title',)
+
     class Meta:
         ordering = ['position']
 
@@ -58,6 +68,8 @@ class Handler(CuratedItem):
     custom_title = models.CharField(max_length=50, blank=True)
     url = models.URLField(null=True, blank=True, max_length=500)
 
+    objects = CuratedItemManager()
+
     class Meta:
         app_label = 'tests'
 
@@ -67,3 +79,84 @@ class Handler(CuratedItem):
         except AttributeError:
             _id = 'Unknown'
         return 'Handler({})'.format(_id)
+
+
+class CachedHandler(Handler):
+    cache_proxied_values = True
+
+    class Meta:
+        proxy = True
+
+
+class UncachedHandler(CachedHandler):
+    cache_proxied_values = False
+
+    class Meta:
+        proxy = True
+
+
+class ProjectedHandler(Handler):
+    proxy_fields = ('title',)
+
+    class Meta:
+        proxy = True
+
+
+TARGET_CONTENT_TYPES = (
+    ('tests.Post', 'Post', 'post'),
+    (ModelA, 'Model A', 'moda'),
+)
+
+
+class CascadingItem(CuratedItem):
+    content_type = ContentTypeSourceField(
+        ct_choices=TARGET_CONTENT_TYPES, source_field='source')
+    object_id = models.PositiveIntegerField()
+    content_object = CuratedGenericForeignKey(
+        'content_type', 'object_id', on_target_delete=deletion.CASCADE, db_index=True)
+    source = models.CharField(max_length=8, null=True, blank=True)
+    group = models.ForeignKey(
+        CuratedPostGroup, null=True, blank=True, on_delete=models.CASCADE)
+
+    objects = CuratedItemManager()
+
+
+class NullingItem(CuratedItem):
+    content_type = ContentTypeSourceField(
+        ct_choices=TARGET_CONTENT_TYPES, source_field='source',
+        null=True, blank=True)
+    object_id = models.PositiveIntegerField(null=True, blank=True)
+    content_object = CuratedGenericForeignKey(
+        'content_type', 'object_id', on_target_delete=deletion.SET_NULL)
+    source = models.CharField(max_length=8, null=True, blank=True)
+
+
+class CountedGroup(CuratedGroupCounters, CuratedGroup):
+    pass
+
+
+class CountedItem(CuratedItem):
+    target = CuratedForeignKey(ModelB, on_delete=models.CASCADE)
+    group = models.ForeignKey(CountedGroup, on_delete=models.CASCADE)
+
+    objects = CuratedItemManager()
+
+
+class Tag(models.Model):
+    slug = models.SlugField(unique=True)
+    name = models.CharField(max_length=50)
+
+    @property
+    def label(self):
+        return '#%s' % self.slug
+
+
+class TagGroup(CuratedGroup):
+    pass
+
+
+class TagItem(CuratedItem):
+    tag = CuratedForeignKey(Tag, to_field='slug', on_delete=models.CASCADE)
+    group = models.ForeignKey(TagGroup, null=True, blank=True, on_delete=models.CASCADE)
+
+    objects = CuratedItemManager()
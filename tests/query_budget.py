@@ -0,0 +1,72 @@
+"""
+Test support for asserting how many queries curation operations run.
+
+Budgets are functions of the size of the input (e.g. the number of items in
+a group), so that a test parametrized over several sizes fails when an
+operation that should run a constant number of queries starts running one
+(or more) per item.
+"""
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+#: Query budgets for curation operations, as functions of the number of
+#: items ``n`` the operation handles.
+BUDGETS = {
+    # Loading the items of a group
+    'load_group': lambda n: 1,
+    # Loading the items of a group and reading a proxied attribute of each,
+    # with the related objects fetched by select_related()
+    'proxied_access_select_related': lambda n: 1,
+    # ...with the generic related objects fetched by prefetch_related(),
+    # which runs one query per content type
+    'proxied_access_prefetch': lambda n: 1 + 3,
+    # ...with the related objects loaded lazily: at most one query per item
+    'proxied_access_lazy': lambda n: 1 + n,
+    'related_lookup': lambda n: 3,
+    'get_content_types': lambda n: 1,
+    # The content type, the object, and the site lookups
+    'shortcut': lambda n: 4,
+    # Validating a formset of n curated items with a ContentTypeSourceField.
+    # Django's model formsets validate each form's pk with a query.
+    'formset_validation': lambda n: 1 + n,
+    # Rendering the admin inline formset of a group of n items: the items
+    # and the choices of the curated ForeignKey select, shared by all forms
+    'admin_inline': lambda n: 1 + 1,
+    # Rendering a formset of n curated items with a ContentTypeSourceField,
+    # whose choices are shared by all forms: the items, and the content type
+    # of the item model rendered in the select's attributes
+    'admin_generic_formset': lambda n: 1 + 1,
+    # Rendering the labels of the items from an admin queryset, with the
+    # generic related objects prefetched (one query per content type)
+    'admin_queryset': lambda n: 1 + 3,
+    # Saving a formset of n curated items where every position changed, with
+    # a bulk update
+    'save_reordered_group': lambda n: 1,
+}
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(operation, n, using=DEFAULT_DB_ALIAS):
+    """
+    Context manager that records the SQL run in its block and raises
+    QueryBudgetExceeded if there are more queries than the budget for
+    ``operation`` allows for ``n`` items.
+    """
+    budget = BUDGETS[operation](n)
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+    executed = len(context.captured_queries)
+    if executed > budget:
+        queries = '\n'.join(
+            '%d. %s' % (i, query['sql'])
+            for i, query in enumerate(context.captured_queries, start=1))
+        raise QueryBudgetExceeded(
+            "%s with n=%d ran %d queries, but its budget is %d:\n%s" % (
+                operation, n, executed, budget, queries))
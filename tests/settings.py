@@ -17,6 +17,9 @@ USE_TZ = True
 DATABASES = {'default': {
     'ENGINE': 'django.db.backends.sqlite3', 
     'NAME': os.getenv('DJANGO_DB_NAME', ':memory:') 
+}, 'other': {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': os.getenv('DJANGO_OTHER_DB_NAME', ':memory:'),
 }}
 
 INSTALLED_APPS = [
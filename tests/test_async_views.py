@@ -0,0 +1,86 @@
+import pytest
+
+from asgiref.sync import async_to_sync
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.contenttypes.models import ContentType
+from django.http import Http404
+from django.test import RequestFactory
+
+from curation import views
+from curation.urls import use_async_views
+from curation.views import async_views
+
+from tests import models
+
+
+def make_request(data=None, user=None):
+    request = RequestFactory().get('/', data)
+    request.user = user or User(username='staff', is_active=True, is_staff=True)
+    return request
+
+
+@pytest.mark.django_db
+def test_related_lookup_matches_sync_view():
+    post = models.Post.objects.create(title='Post')
+    models.Handler.objects.create(content_object=post, position=0)
+    params = {
+        'app_label': 'tests',
+        'model_name': 'post',
+        'object_id': post.pk,
+        'ct_field': 'content_type',
+        'fk_field': 'object_id',
+        'ct_id': ContentType.objects.get_for_model(models.Handler).pk,
+    }
+    response = async_to_sync(async_views.related_lookup)(make_request(params))
+    assert response.status_code == 200
+    assert response.content == views.related_lookup(make_request(params)).content
+
+    params['object_id'] = post.pk + 1
+    response = async_to_sync(async_views.related_lookup)(make_request(params))
+    assert response.content == views.related_lookup(make_request(params)).content
+
+
+@pytest.mark.django_db
+def test_get_content_types_matches_sync_view():
+    views.content_types = None
+    response = async_to_sync(async_views.get_content_types)(make_request())
+    assert response.status_code == 200
+    views.content_types = None
+    assert response.content == views.get_content_types(make_request()).content
+
+
+@pytest.mark.django_db
+def test_shortcut():
+    post = models.Post.objects.create(title='Post')
+    post_ct = ContentType.objects.get_for_model(models.Post)
+    response = async_to_sync(async_views.shortcut)(make_request(), post_ct.pk, post.pk)
+    assert response.status_code == 302
+    assert response['Location'].endswith(post.get_absolute_url())
+    with pytest.raises(Http404):
+        async_to_sync(async_views.shortcut)(make_request(), post_ct.pk, post.pk + 1)
+
+
+@pytest.mark.django_db
+def test_async_admin_view():
+    view = async_views.async_admin_view(async_views.get_content_types)
+    response = async_to_sync(view)(make_request(user=AnonymousUser()))
+    assert response.status_code == 302
+    assert '/admin/login/' in response['Location']
+
+    response = async_to_sync(view)(make_request())
+    assert response.status_code == 200
+    assert 'no-cache' in response['Cache-Control']
+
+
+def test_use_async_views(settings):
+    import sys
+    # Importing asgi.py (e.g. from a test or management command) doesn't
+    # switch to the async views
+    __import__('django.core.asgi')
+    assert 'django.core.asgi' in sys.modules
+    assert not use_async_views()
+    settings.CURATION_ASYNC_VIEWS = True
+    assert use_async_views()
+    settings.CURATION_ASYNC_VIEWS = False
+    assert not use_async_views()
@@ -0,0 +1,198 @@
+import pytest
+
+from django.template import Context, Template, TemplateSyntaxError
+
+from curation import cache as curation_cache
+
+from tests import models
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    curation_cache.get_cache().clear()
+    yield
+    curation_cache.get_cache().clear()
+
+
+def make_group():
+    group = models.CuratedPostGroup.objects.create(name='Group', slug='homepage')
+    for i in range(3):
+        post = models.Post.objects.create(title='Post %d' % i)
+        models.CuratedPostItem.objects.create(post=post, group=group, position=i)
+    return group
+
+
+@pytest.mark.django_db(transaction=True)
+def test_get_group_items(django_assert_num_queries):
+    group = make_group()
+
+    # The group version, the items and the posts
+    with django_assert_num_queries(3):
+        items = curation_cache.get_group_items(models.CuratedPostItem, 'homepage')
+    assert [item.title for item in items] == ['Post 0', 'Post 1', 'Post 2']
+    with django_assert_num_queries(0):
+        items = curation_cache.get_group_items(models.CuratedPostItem, 'homepage')
+        assert [item.title for item in items] == ['Post 0', 'Post 1', 'Post 2']
+
+    items[0].delete()
+    assert [item.title for item in curation_cache.get_group_items(
+        models.CuratedPostItem, 'homepage')] == ['Post 1', 'Post 2']
+
+    # Renaming the group drops the cached version read by the old slug, and
+    # doesn't overwrite the version with the stale one it was loaded with
+    group.slug = 'renamed'
+    group.save()
+    assert curation_cache.get_group_items(models.CuratedPostItem, 'homepage') == []
+    assert curation_cache.get_group_version(models.CuratedPostGroup, 'renamed') == 4
+
+
+@pytest.mark.django_db(transaction=True)
+def test_version_read_before_write(monkeypatch):
+    make_group()
+    group_pk = models.CuratedPostGroup.objects.get().pk
+    cache = curation_cache.get_cache()
+    cache.delete(curation_cache.group_version_key(models.CuratedPostGroup, group_pk))
+    add = cache.add
+
+    def add_after_write(*args, **kwargs):
+        # An item is deleted between the read of the version and its caching
+        monkeypatch.setattr(cache, 'add', add)
+        models.CuratedPostItem.objects.get(position=0).delete()
+        return add(*args, **kwargs)
+
+    monkeypatch.setattr(cache, 'add', add_after_write)
+    assert curation_cache.get_group_version(models.CuratedPostGroup, 'homepage') == 3
+    assert curation_cache.get_group_version(models.CuratedPostGroup, 'homepage') == 4
+
+
+@pytest.mark.django_db(transaction=True)
+def test_curated_group_tags(django_assert_num_queries):
+    make_group()
+    template = Template(
+        '{% load curation_tags %}'
+        '{% curated_group "tests.CuratedPostItem" slug as items %}'
+        '{% for item in items %}{{ item.title }};{% endfor %}')
+    with django_assert_num_queries(2):
+        assert template.render(Context({'slug': 'homepage'})) == 'Post 0;Post 1;Post 2;'
+
+    template = Template(
+        '{% load curation_tags %}'
+        '{% cached_curated_group "tests.CuratedPostItem" slug as items suffix %}'
+        '{% for item in items %}{{ item.title }}{{ suffix }}{% endfor %}'
+        '{% endcached_curated_group %}')
+    context = {'slug': 'homepage', 'suffix': ';'}
+    # The group version, the items and the posts
+    with django_assert_num_queries(3):
+        assert template.render(Context(context)) == 'Post 0;Post 1;Post 2;'
+    with django_assert_num_queries(0):
+        assert template.render(Context(context)) == 'Post 0;Post 1;Post 2;'
+    assert template.render(Context(dict(context, suffix=','))) == 'Post 0,Post 1,Post 2,'
+
+    models.CuratedPostItem.objects.get(position=1).delete()
+    assert template.render(Context(context)) == 'Post 0;Post 2;'
+    assert template.render(Context(dict(context, slug='missing'))) == ''
+
+    # Blocks are cached apart without the positions of a debug engine
+    from django.template import Engine
+    template = Engine(debug=False, libraries={
+        'curation_tags': 'curation.templatetags.curation_tags',
+    }).from_string(
+        '{% load curation_tags %}'
+        '{% cached_curated_group "tests.CuratedPostItem" slug as items %}'
+        'A:{{ items.0.title }}{% endcached_curated_group %}|'
+        '{% cached_curated_group "tests.CuratedPostItem" slug as items %}'
+        'B:{{ items.1.title }}{% endcached_curated_group %}')
+    assert template.render(Context(context)) == 'A:Post 0|B:Post 2'
+
+    with pytest.raises(TemplateSyntaxError):
+        Template('{% load curation_tags %}'
+                 '{% curated_group "tests.Post" "homepage" as items %}').render(Context())
+
+
+@pytest.mark.django_db(transaction=True)
+def test_group_json(client, settings, django_assert_num_queries):
+    import json
+
+    make_group()
+    url = '/curation/groups/tests.curatedpostitem/homepage.json'
+    assert client.get(url).status_code == 404
+    settings.CURATION_JSON_MODELS = ['tests.CuratedPostItem']
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.streaming
+    data = json.loads(b''.join(response.streaming_content))
+    assert (data['group'], data['version']) == ('homepage', 3)
+    assert [item['target']['title'] for item in data['items']] == [
+        'Post 0', 'Post 1', 'Post 2']
+    etag = response['ETag']
+    assert etag.startswith('W/"')
+
+    # The cached version is checked without running the item query
+    with django_assert_num_queries(0):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response['ETag'] == etag
+
+    models.CuratedPostItem.objects.get(position=0).delete()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert len(json.loads(b''.join(response.streaming_content))['items']) == 2
+
+    assert client.get('/curation/groups/tests.curatedpostitem/missing.json').status_code == 404
+    assert client.post(url).status_code == 405
+
+
+@pytest.mark.django_db(transaction=True)
+def test_stale_while_revalidate(settings, django_assert_num_queries, monkeypatch):
+    settings.CURATION_CACHE_SOFT_TIMEOUT = 60
+    make_group()
+    cache = curation_cache.get_cache()
+    curation_cache.get_group_items(models.CuratedPostItem, 'homepage')
+    models.CuratedPostItem.objects.get(position=0).delete()
+    group_pk = models.CuratedPostGroup.objects.get().pk
+    lock_key = curation_cache.group_items_key(models.CuratedPostItem, group_pk) + ':lock'
+
+    # While another caller holds the lock, the stale items are returned
+    # without queries, since the delete cached the group's new version
+    cache.add(lock_key, True)
+    with django_assert_num_queries(0):
+        version, items = curation_cache.get_group_entry(models.CuratedPostItem, 'homepage')
+    assert (version, len(items)) == (3, 3)
+    cache.delete(lock_key)
+
+    version, items = curation_cache.get_group_entry(models.CuratedPostItem, 'homepage')
+    assert (version, len(items)) == (4, 2)
+    assert cache.get(lock_key) is None
+
+    # Soft expiry without a write
+    now = curation_cache.time.time()
+    monkeypatch.setattr(curation_cache.time, 'time', lambda: now + 120)
+    with django_assert_num_queries(2):
+        curation_cache.get_group_items(models.CuratedPostItem, 'homepage')
+    with django_assert_num_queries(0):
+        curation_cache.get_group_items(models.CuratedPostItem, 'homepage')
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize('workers', ['1', '3'])
+def test_warm_curated_cache(workers, django_assert_num_queries):
+    from io import StringIO
+    from django.core.management import call_command
+
+    make_group()
+    group = models.CuratedPostGroup.objects.create(name='Other', slug='other')
+    models.CuratedPostItem.objects.create(
+        post=models.Post.objects.create(title='Other'), group=group, position=0)
+
+    out = StringIO()
+    call_command('warm_curated_cache', 'tests.CuratedPostItem', '--workers', workers,
+                 stdout=out)
+    assert out.getvalue().startswith("Warmed 2 groups (4 items) in ")
+    with django_assert_num_queries(0):
+        assert len(curation_cache.get_group_items(models.CuratedPostItem, 'homepage')) == 3
+        assert len(curation_cache.get_group_items(models.CuratedPostItem, 'other')) == 1
+
+    out = StringIO()
+    call_command('warm_curated_cache', '--limit', '1', '--workers', workers, stdout=out)
+    assert out.getvalue().startswith("Warmed 1 groups (3 items) in ")
@@ -0,0 +1,147 @@
+import json
+from io import StringIO
+
+import pytest
+
+from django.core.management import call_command
+
+from tests import models
+
+
+def make_items():
+    group = models.CuratedPostGroup.objects.create(name='Group', slug='slug')
+    other = models.CuratedPostGroup.objects.create(name='Other', slug='other')
+    for i in range(3):
+        post = models.Post.objects.create(title='Post %d' % i, body='Body %d' % i)
+        models.CuratedPostItem.objects.create(
+            post=post, group=group if i < 2 else other, position=i)
+        models.Handler.objects.create(content_object=post, position=i)
+    models.Handler.objects.create(
+        content_object=models.ModelA.objects.create(a_field='a'), position=3,
+        custom_title='Custom')
+    models.Handler.objects.create(
+        url='http://example.com/', source='url', object_id=0, position=4)
+
+
+def export(*args):
+    out = StringIO()
+    call_command('export_curated_items', *args, stdout=out)
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+@pytest.mark.django_db
+def test_export_curated_items(django_assert_max_num_queries):
+    make_items()
+
+    # One query for the items and one per chunk
+    with django_assert_max_num_queries(3):
+        records = export('tests.CuratedPostItem', '--group', 'slug', '--chunk-size', '1')
+    assert [r['target'] for r in records] == [
+        {'model': 'tests.post', 'pk': r['post_id'], 'title': 'Post %d' % i}
+        for i, r in enumerate(records)]
+    assert records[0]['group_id'] == records[1]['group_id']
+    assert len(export('tests.CuratedPostItem', '--group', 'slug', '--group', 'other')) == 3
+
+    records = export('tests.Handler')
+    assert records[0]['target']['body'] == 'Body 0'
+    assert records[3]['target'] == {
+        'model': 'tests.modela', 'pk': records[3]['object_id'], 'id': records[3]['object_id'],
+        'a_field': 'a'}
+    assert records[4]['target'] is None
+    assert records[4]['url'] == 'http://example.com/'
+
+    records = export('tests.Handler', '--fields', 'title')
+    assert [r['target'] and r['target']['title'] for r in records] == [
+        'Post 0', 'Post 1', 'Post 2', 'Custom', None]
+
+    # Fields are read from the target rather than the item's own fields
+    records = export('tests.Handler', '--fields', 'id,position')
+    assert [r['target'] and (r['target']['id'], r['target']['position']) for r in records] == [
+        (r['object_id'], None) for r in records[:4]] + [None]
+
+
+@pytest.mark.django_db
+def test_sweep_dangling_items(django_assert_max_num_queries, monkeypatch):
+    from curation import dangling
+    from curation.dangling import find_dangling_items
+
+    make_items()
+    models.Post.objects.filter(title__in=['Post 0', 'Post 2']).delete()
+    models.ModelA.objects.all().delete()
+    handlers = list(models.Handler.objects.all())
+
+    # One query for the content types, and per content type, one anti-join
+    # per batch plus one to find that there are no more
+    with django_assert_max_num_queries(1 + 2 * 3):
+        found = list(find_dangling_items(models.Handler, batch_size=5))
+    assert sorted((ct.model, pks) for ct, pks in found) == [
+        ('modela', [handlers[3].pk]), ('post', [handlers[0].pk, handlers[2].pk])]
+    assert len(list(find_dangling_items(models.Handler, batch_size=1))) == 3
+    # Items and targets that can't be anti-joined are checked with pk__in
+    monkeypatch.setattr(dangling, '_can_anti_join', lambda fk_field, target_cls: False)
+    assert list(find_dangling_items(models.Handler, batch_size=5)) == found
+    monkeypatch.undo()
+
+    # Curated items with dangling targets raise DoesNotExist on proxied reads
+    with pytest.raises(models.Post.DoesNotExist):
+        handlers[0].title
+
+    out = StringIO()
+    call_command('sweep_dangling_items', 'tests.Handler', stdout=out)
+    assert 'tests.Handler: 2 dangling items pointing to' in out.getvalue()
+    assert models.Handler.objects.count() == 5
+
+    out = StringIO()
+    call_command('sweep_dangling_items', '--delete', '--batch-size', '1', stdout=out)
+    assert 'tests.Handler: deleted 3 dangling items' in out.getvalue()
+    assert list(models.Handler.objects.all()) == [handlers[1], handlers[4]]
+
+
+@pytest.mark.django_db
+def test_repair_curated_counters(django_assert_num_queries):
+    group = models.CountedGroup.objects.create(name='Group', slug='slug')
+    other = models.CountedGroup.objects.create(name='Other', slug='other')
+    for i in range(3):
+        models.CountedItem.objects.create(
+            target=models.ModelB.objects.create(b_field='b%d' % i),
+            group=group, position=i * 2)
+    models.CountedGroup.objects.update(item_count=10, max_position=10)
+
+    out = StringIO()
+    # A single UPDATE of all of the groups
+    with django_assert_num_queries(1):
+        call_command('repair_curated_counters', stdout=out)
+    assert out.getvalue() == "tests.CountedGroup: repaired the counters of 2 groups\n"
+    group.refresh_from_db()
+    other.refresh_from_db()
+    assert (group.item_count, group.max_position) == (3, 4)
+    assert (other.item_count, other.max_position) == (0, None)
+
+    out = StringIO()
+    call_command('repair_curated_counters', 'tests.CountedGroup',
+                 '--group', 'other', stdout=out)
+    assert "of 1 groups" in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_repair_curated_counters_in_chunks(django_assert_num_queries):
+    groups = [models.CountedGroup.objects.create(name='Group %d' % i, slug='group-%d' % i)
+              for i in range(5)]
+    for i, group in enumerate(groups):
+        for position in range(i):
+            models.CountedItem.objects.create(
+                target=models.ModelB.objects.create(b_field='b'),
+                group=group, position=position)
+    models.CountedGroup.objects.update(item_count=10, max_position=10)
+
+    out = StringIO()
+    # The pages of group pks, and per chunk of 2 groups: the groups, the
+    # aggregates of their items and the bulk update
+    with django_assert_num_queries(4 + 3 * 3):
+        call_command('repair_curated_counters', 'tests.CountedGroup', '--processes', '1',
+                     '--chunk-size', '2', stdout=out)
+    lines = out.getvalue().splitlines()
+    assert lines[0].startswith("tests.CountedGroup: 2 groups (1/3 chunks) in ")
+    assert lines[-1] == "tests.CountedGroup: repaired the counters of 5 groups"
+    assert list(models.CountedGroup.objects.values_list('item_count', 'max_position')) == [
+        (0, None), (1, 0), (2, 1), (3, 2), (4, 3)]
@@ -128,3 +128,727 @@ def test_form_save_self_ctype():
     assert handler.source == 'url'
     assert handler.title == 'The Atlantic'
     assert handler.url == 'https://www.theatlantic.com/'
+
+
+@pytest.mark.django_db
+def test_curated_gfk_cached_access(django_assert_num_queries):
+    post = models.Post.objects.create(title='Hello, curation')
+    a_obj = models.ModelA.objects.create(a_field='a')
+    models.Handler.objects.create(content_object=post, position=0)
+
+    h = models.Handler.objects.get()
+    assert h.content_object == post
+    with django_assert_num_queries(0):
+        assert h.content_object == post
+        assert h.title == 'Hello, curation'
+
+    # Changing the object id or content type invalidates the cached object
+    h.object_id = a_obj.pk
+    h.content_type = ContentType.objects.get_for_model(a_obj)
+    assert h.content_object == a_obj
+
+
+@pytest.mark.django_db
+def test_cache_proxied_values():
+    post = models.Post.objects.create(title='Hello, curation')
+    a_obj = models.ModelA.objects.create(a_field='a')
+    models.Handler.objects.create(content_object=post, position=0)
+
+    h = models.CachedHandler.objects.get()
+    assert h.title == 'Hello, curation'
+    assert h.__dict__['_proxied_values'] == {'title': 'Hello, curation'}
+
+    # Assigning an override field clears the memo
+    h.custom_title = 'Custom'
+    assert '_proxied_values' not in h.__dict__
+    assert h.title == 'Custom'
+
+    # As does pointing the curated field at another object
+    h.content_object = a_obj
+    assert '_proxied_values' not in h.__dict__
+    assert h.a_field == 'a'
+
+    # Changes to the related object itself need an explicit clear
+    a_obj.a_field = 'b'
+    assert h.a_field == 'a'
+    h.clear_proxied_values()
+    assert h.a_field == 'b'
+
+    # Subclasses can turn the memo back off
+    h = models.UncachedHandler.objects.get()
+    h.custom_title = 'Custom'
+    assert h.title == 'Custom'
+    assert '_proxied_values' not in h.__dict__
+
+
+@pytest.mark.django_db
+def test_missing_proxy_attr_cache(django_assert_num_queries):
+    post = models.Post.objects.create(title='Hello, curation')
+    group = models.CuratedPostGroup.objects.create(name='Group', slug='slug')
+    models.CuratedPostItem.objects.create(post=post, group=group, position=1)
+    models.Handler.objects.create(content_object=post, position=0)
+
+    item = models.CuratedPostItem.objects.get()
+    handler = models.Handler.objects.get()
+    with django_assert_num_queries(0):
+        assert not hasattr(item, 'not_a_field')
+        assert not hasattr(handler, 'not_a_field')
+    assert 'not_a_field' in models.CuratedPostItem._meta._missing_proxy_attrs[models.Post]
+    assert 'not_a_field' in models.Handler._meta._missing_proxy_attrs[models.Post]
+
+    # The missing attribute cache doesn't apply to other related models
+    a_obj = models.ModelA.objects.create(a_field='a')
+    handler.content_object = a_obj
+    assert handler.a_field == 'a'
+    assert not hasattr(handler, 'not_a_field')
+
+    with django_assert_num_queries(1):
+        assert item.title == 'Hello, curation'
+
+
+@pytest.mark.django_db
+def test_item_views(django_assert_num_queries):
+    group = models.CuratedPostGroup.objects.create(name='Group', slug='slug')
+    posts = [models.Post.objects.create(title='Post %d' % i) for i in range(3)]
+    for i, post in enumerate(posts):
+        models.CuratedPostItem.objects.create(post=post, group=group, position=i)
+    a_obj = models.ModelA.objects.create(a_field='a')
+    models.Handler.objects.create(content_object=posts[0], position=0)
+    models.Handler.objects.create(content_object=posts[1], position=1, custom_title='Custom')
+    models.Handler.objects.create(content_object=a_obj, position=2)
+
+    with django_assert_num_queries(2):
+        views = models.CuratedPostItem.objects.group('slug').views()
+    assert [v.title for v in views] == ['Post 0', 'Post 1', 'Post 2']
+    assert [v.position for v in views] == [0, 1, 2]
+    assert views[0].post_id == posts[0].pk
+    assert not hasattr(views[0], '__dict__')
+
+    with django_assert_num_queries(3):
+        views = models.Handler.objects.views()
+    assert views[0].title == 'Post 0'
+    assert views[1].title == 'Custom'
+    assert views[2].a_field == 'a'
+    assert views[2].source == 'moda'
+    assert not hasattr(views[2], 'title')
+
+    # Methods and properties of the related objects are proxied
+    with django_assert_num_queries(0):
+        assert views[0].get_absolute_url() == posts[0].get_absolute_url()
+    assert not hasattr(views[2], 'get_absolute_url')
+    views = models.CuratedPostItem.objects.group('slug').views()
+    with django_assert_num_queries(0):
+        assert views[1].get_absolute_url() == posts[1].get_absolute_url()
+    assert not hasattr(views[0], 'save')
+
+    # A ForeignKey with a to_field is matched on that field
+    tags = [models.Tag.objects.create(slug='tag-%d' % i, name='Tag %d' % i) for i in range(2)]
+    models.TagItem.objects.create(tag=tags[1], position=0)
+    models.TagItem.objects.create(tag=tags[0], position=1)
+    with django_assert_num_queries(2):
+        views = models.TagItem.objects.views()
+    assert [(v.tag_id, v.name, v.label) for v in views] == [
+        ('tag-1', 'Tag 1', '#tag-1'), ('tag-0', 'Tag 0', '#tag-0')]
+
+
+@pytest.mark.django_db
+def test_resolved(django_assert_num_queries):
+    group = models.CuratedPostGroup.objects.create(name='Group', slug='slug')
+    for i in range(3):
+        post = models.Post.objects.create(title='Post %d' % i)
+        models.CuratedPostItem.objects.create(post=post, group=group, position=i)
+        models.Handler.objects.create(content_object=post, position=i)
+    models.Handler.objects.create(
+        content_object=models.ModelA.objects.create(a_field='a'), position=3)
+    missing = models.Post.objects.create(title='Missing')
+    models.Handler.objects.create(content_object=missing, position=4)
+    missing_pk = missing.pk
+    missing.delete()
+    ContentType.objects.get_for_models(models.Post, models.ModelA, models.Handler)
+
+    # One query for the items and one for the posts of each chunk
+    with django_assert_num_queries(3):
+        items = models.CuratedPostItem.objects.group('slug').resolved(chunk_size=2)
+        assert [item.title for item in items] == ['Post 0', 'Post 1', 'Post 2']
+    # One query for the items, and one per content type
+    with django_assert_num_queries(3):
+        handlers = list(models.Handler.objects.resolved())
+        assert handlers[0].title == 'Post 0'
+        assert handlers[3].a_field == 'a'
+        assert handlers[4].content_object is None
+        assert handlers[4].object_id == missing_pk
+
+
+@pytest.mark.django_db
+def test_aresolved():
+    from asgiref.sync import async_to_sync
+
+    post = models.Post.objects.create(title='Post')
+    group = models.CuratedPostGroup.objects.create(name='Group', slug='slug')
+    models.CuratedPostItem.objects.create(post=post, group=group, position=0)
+    models.Handler.objects.create(content_object=post, position=0)
+    models.Handler.objects.create(
+        content_object=models.ModelA.objects.create(a_field='a'), position=1)
+
+    # Lazy loads would raise SynchronousOnlyOperation in the event loop
+    async def read_titles():
+        titles = [item.title async for item in
+                  models.CuratedPostItem.objects.group('slug').aresolved()]
+        titles += [getattr(handler, 'title', handler.source) async for handler in
+                   models.Handler.objects.aresolved(chunk_size=1)]
+        return titles
+
+    assert async_to_sync(read_titles)() == ['Post', 'Post', 'moda']
+
+
+@pytest.mark.django_db
+def test_proxy_fields(django_assert_num_queries):
+    post = models.Post.objects.create(title='Hello, curation', body='Long body')
+    group = models.CuratedPostGroup.objects.create(name='Group', slug='slug')
+    models.CuratedPostItem.objects.create(post=post, group=group, position=1)
+    models.Handler.objects.create(content_object=post, position=0)
+
+    item = models.CuratedPostItem.objects.get()
+    assert item.post.get_deferred_fields() == {'body'}
+    with django_assert_num_queries(0):
+        assert item.title == 'Hello, curation'
+    # Fields not in proxy_fields are loaded on access
+    with django_assert_num_queries(1):
+        assert item.body == 'Long body'
+
+    items = list(models.CuratedPostItem.objects.prefetch_related('post'))
+    assert items[0].post.get_deferred_fields() == {'body'}
+
+    handler = models.ProjectedHandler.objects.get()
+    assert handler.content_object.get_deferred_fields() == {'body'}
+    handler = models.ProjectedHandler.objects.prefetch_related('content_object').get()
+    assert handler.content_object.get_deferred_fields() == {'body'}
+    assert handler.title == 'Hello, curation'
+
+    assert not models.Handler.objects.get().content_object.get_deferred_fields()
+    assert not hasattr(models.CuratedPostItem.objects.views()[0], 'body')
+
+    from curation.prefetch import with_curated_targets
+    with django_assert_num_queries(1):
+        items = list(with_curated_targets(models.CuratedPostItem.objects.all()))
+        assert [item.title for item in items] == ['Hello, curation']
+    assert items[0].post.get_deferred_fields() == {'body'}
+    assert not items[0].get_deferred_fields()
+    # Fields deferred by the queryset are kept
+    items = with_curated_targets(models.CuratedPostItem.objects.defer('position'))
+    assert items[0].get_deferred_fields() == {'position'}
+    assert not items[0].post.get_deferred_fields()
+
+
+@pytest.mark.django_db
+def test_instrumentation_events():
+    from curation import instrumentation
+
+    post = models.Post.objects.create(title='Hello, curation')
+    models.Handler.objects.create(content_object=post, position=0)
+
+    stats = instrumentation.EventStats()
+    instrumentation.add_sink(stats)
+    try:
+        h = models.Handler.objects.get()
+        h.title
+        h.title
+        hasattr(h, 'not_a_field')
+        h.source = 'moda'
+    finally:
+        instrumentation.remove_sink(stats)
+    assert not instrumentation.enabled
+
+    summary = stats.summary()
+    assert summary['gfk_load'][0] == 1
+    assert summary['gfk_cache_hit'][0] == 1
+    assert summary['proxied_read'][0] == 2
+    assert summary['proxied_miss'][0] == 1
+    assert summary['contribute_to_instance'][0] == 1
+    assert summary['ct_choices_lookup'][0] >= 1
+    assert summary['ct_choices_lookup'][1] > 0
+
+
+@pytest.mark.django_db
+def test_instrumentation_middleware(caplog):
+    from django.http import HttpResponse
+    from django.test import RequestFactory
+    from curation import instrumentation
+    from curation.middleware import CurationInstrumentationMiddleware, request_stats_sink
+
+    post = models.Post.objects.create(title='Hello, curation')
+    models.Handler.objects.create(content_object=post, position=0)
+
+    def view(request):
+        return HttpResponse(models.Handler.objects.get().title)
+
+    middleware = CurationInstrumentationMiddleware(view)
+    request = RequestFactory().get('/page/')
+    try:
+        with caplog.at_level('INFO', logger='curation.instrumentation.requests'):
+            middleware(request)
+    finally:
+        instrumentation.remove_sink(request_stats_sink)
+    assert request.curation_stats.summary()['gfk_load'][0] == 1
+    assert 'GET /page/' in caplog.text
+    assert 'gfk_load=1' in caplog.text
+
+
+@pytest.mark.django_db
+def test_n_plus_one_detection():
+    from curation import debug
+
+    group = models.CuratedPostGroup.objects.create(name='Group', slug='slug')
+    for i in range(5):
+        post = models.Post.objects.create(title='Post %d' % i)
+        models.CuratedPostItem.objects.create(post=post, group=group, position=i)
+        models.Handler.objects.create(content_object=post, position=i)
+
+    with debug.detect_n_plus_one(threshold=3, action='raise'):
+        with pytest.raises(debug.NPlusOneError) as excinfo:
+            for item in models.CuratedPostItem.objects.group('slug'):
+                item.title
+        msg = str(excinfo.value)
+        assert 'tests.CuratedPostItem' in msg
+        assert "'post'" in msg
+        assert "select_related('post')" in msg
+        assert 'test_curation.py' in msg
+
+        with pytest.warns(debug.NPlusOneWarning):
+            debug.detector.action = 'warn'
+            for handler in models.Handler.objects.all():
+                handler.title
+
+        # No report when the related objects are loaded up front
+        debug.detector.action = 'raise'
+        for item in models.CuratedPostItem.objects.group('slug').select_related('post'):
+            item.title
+        for handler in models.Handler.objects.prefetch_related('content_object'):
+            handler.title
+    assert debug.detector is None
+
+
+@pytest.mark.django_db
+def test_on_target_delete(django_assert_num_queries):
+    posts = [models.Post.objects.create(title='Post %d' % i) for i in range(10)]
+    a_obj = models.ModelA.objects.create(a_field='a')
+    for i, post in enumerate(posts):
+        models.CascadingItem.objects.create(content_object=post, position=i)
+        models.NullingItem.objects.create(content_object=post, position=i)
+    models.CascadingItem.objects.create(content_object=a_obj, position=10)
+    models.NullingItem.objects.create(content_object=a_obj, position=10)
+    # Populate the ContentType cache
+    ContentType.objects.get_for_models(models.Post, models.ModelA)
+
+    # The post select, the CuratedPostItem cascade, the post delete, and one
+    # query for the curated items of each curated item model
+    with django_assert_num_queries(5):
+        models.Post.objects.filter(title__in=['Post 0', 'Post 1', 'Post 2']).delete()
+    assert models.CascadingItem.objects.count() == 8
+    assert models.NullingItem.objects.filter(object_id=None, content_type=None).count() == 3
+
+    posts[3].delete()
+    a_obj.delete()
+    assert sorted(models.CascadingItem.objects.values_list('position', flat=True)) == [
+        4, 5, 6, 7, 8, 9]
+    assert models.NullingItem.objects.filter(object_id=None).count() == 5
+    # Deleting the curated items themselves isn't affected
+    models.CascadingItem.objects.all().delete()
+    assert models.NullingItem.objects.count() == 11
+
+
+@pytest.mark.django_db
+def test_on_target_delete_rollback():
+    from django.db import transaction
+    from django.db.models import signals
+
+    posts = [models.Post.objects.create(title='Post %d' % i) for i in range(2)]
+    for i, post in enumerate(posts):
+        models.CascadingItem.objects.create(content_object=post, position=i)
+
+    def fail(sender, instance, **kwargs):
+        raise RuntimeError("Delete failed")
+
+    signals.pre_delete.connect(fail, sender=models.Post)
+    try:
+        with pytest.raises(RuntimeError), transaction.atomic():
+            posts[0].delete()
+    finally:
+        signals.pre_delete.disconnect(fail, sender=models.Post)
+
+    # The next delete doesn't delete the items of the post that wasn't deleted
+    posts[1].delete()
+    assert models.Post.objects.get() == posts[0]
+    assert list(models.CascadingItem.objects.values_list('position', flat=True)) == [0]
+
+
+def test_on_target_delete_checks():
+    with pytest.raises(ValueError):
+        curation.fields.CuratedGenericForeignKey(on_target_delete='protect')
+    field = models.NullingItem._meta.get_field('content_object')
+    assert field.check() == []
+    field = models.Handler._meta.get_field('content_object')
+    field.on_target_delete = 'set_null'
+    try:
+        assert [e.id for e in field.check()] == ['curation.E001']
+    finally:
+        field.on_target_delete = None
+
+
+@pytest.mark.django_db
+def test_groups_containing(django_assert_num_queries):
+    home = models.CuratedPostGroup.objects.create(name='Home', slug='home')
+    news = models.CuratedPostGroup.objects.create(name='News', slug='news')
+    posts = [models.Post.objects.create(title='Post %d' % i) for i in range(3)]
+    a_obj = models.ModelA.objects.create(a_field='a')
+    for group, post, position in [(home, posts[0], 1), (news, posts[0], 0), (home, posts[1], 0)]:
+        models.CuratedPostItem.objects.create(post=post, group=group, position=position)
+        models.CascadingItem.objects.create(content_object=post, group=group, position=position)
+    models.CascadingItem.objects.create(content_object=a_obj, group=news, position=1)
+    ContentType.objects.get_for_models(models.Post, models.ModelA)
+
+    with django_assert_num_queries(1):
+        groups = models.CuratedPostItem.objects.groups_containing(posts)
+    assert groups == {
+        posts[0]: [('home', 1), ('news', 0)],
+        posts[1]: [('home', 0)],
+        posts[2]: [],
+    }
+    # One query per content type
+    with django_assert_num_queries(2):
+        groups = models.CascadingItem.objects.groups_containing(posts + [a_obj])
+    assert groups[posts[0]] == [('home', 1), ('news', 0)]
+    assert groups[a_obj] == [('news', 1)]
+    assert models.CascadingItem.objects.filter(
+        group__slug='news').groups_containing(posts)[posts[0]] == [('news', 0)]
+    assert models.CascadingItem.objects.groups_containing([]) == {}
+
+    # Objects of other models don't collide with the posts of the same pk
+    assert a_obj.pk == posts[0].pk
+    with django_assert_num_queries(1):
+        groups = models.CuratedPostItem.objects.groups_containing([posts[0], a_obj])
+    assert groups == {posts[0]: [('home', 1), ('news', 0)], a_obj: []}
+
+    # A ForeignKey with a to_field is matched on that field
+    tags = [models.Tag.objects.create(slug='tag-%d' % i, name='Tag') for i in range(2)]
+    tag_group = models.TagGroup.objects.create(name='News', slug='news')
+    models.TagItem.objects.create(tag=tags[1], group=tag_group, position=2)
+    assert models.TagItem.objects.groups_containing(tags) == {
+        tags[0]: [], tags[1]: [('news', 2)]}
+    assert [index.fields for index in models.CascadingItem._meta.indexes] == [
+        ['content_type', 'object_id']]
+
+
+@pytest.mark.django_db
+def test_group_version():
+    from django.forms.models import inlineformset_factory
+    from curation.admin import CuratedItemInlineFormSet
+    from curation.models import VersionConflict
+
+    group = models.CuratedPostGroup.objects.create(name='Group', slug='slug')
+    post = models.Post.objects.create(title='Post')
+    item = models.CuratedPostItem.objects.create(post=post, group=group, position=0)
+    assert models.CuratedPostGroup.get_version('slug') == 1
+    item.delete()
+    assert models.CuratedPostGroup.get_version('slug') == 2
+    assert models.CuratedPostGroup.get_version('missing') is None
+
+    group.refresh_from_db()
+    group.bump_version(expected=2)
+    assert group.version == 3
+    with pytest.raises(VersionConflict):
+        group.bump_version(expected=2)
+
+    FormSet = inlineformset_factory(
+        models.CuratedPostGroup, models.CuratedPostItem, fields=['post', 'position'],
+        formset=CuratedItemInlineFormSet, extra=1)
+    assert 'name="curatedpostitem_set-GROUP_VERSION" value="3"' in str(
+        FormSet(instance=group).management_form)
+
+    def submit(version):
+        group = models.CuratedPostGroup.objects.get()
+        return FormSet({
+            'curatedpostitem_set-TOTAL_FORMS': '1',
+            'curatedpostitem_set-INITIAL_FORMS': '0',
+            'curatedpostitem_set-GROUP_VERSION': str(version),
+            'curatedpostitem_set-0-post': str(post.pk),
+            'curatedpostitem_set-0-position': '1',
+        }, instance=group)
+
+    formset = submit(3)
+    assert formset.is_valid(), formset.errors
+    formset.save()
+    assert models.CuratedPostGroup.get_version('slug') == 4
+
+    # A second editor's changes based on version 3
+    formset = submit(3)
+    assert not formset.is_valid()
+    assert 'changed by someone else' in formset.non_form_errors()[0]
+
+    # A change to the group between validation and saving
+    formset = submit(4)
+    assert formset.is_valid(), formset.errors
+    group.bump_version()
+    with pytest.raises(VersionConflict):
+        formset.save()
+
+
+@pytest.mark.django_db
+def test_group_version_changelist():
+    from django.forms.models import modelformset_factory
+    from curation.admin import CuratedItemModelFormSet
+
+    def version(group):
+        group.refresh_from_db()
+        return group.version
+
+    group = models.CuratedPostGroup.objects.create(name='Group', slug='slug')
+    other = models.CuratedPostGroup.objects.create(name='Other', slug='other')
+    unchanged = models.CuratedPostGroup.objects.create(name='Unchanged', slug='unchanged')
+    post = models.Post.objects.create(title='Post')
+    items = [models.CuratedPostItem.objects.create(post=post, group=g, position=0)
+             for g in (group, unchanged)]
+    assert (version(group), version(other), version(unchanged)) == (1, 0, 1)
+
+    # Items edited outside of their group's inline are written in bulk, and
+    # bump the versions of the groups they were moved between
+    FormSet = modelformset_factory(
+        models.CuratedPostItem, fields=['group', 'position'], extra=0,
+        formset=CuratedItemModelFormSet)
+    queryset = models.CuratedPostItem.objects.order_by('pk')
+    formset = FormSet({
+        'form-TOTAL_FORMS': '2',
+        'form-INITIAL_FORMS': '2',
+        'form-0-primary_id': str(items[0].pk),
+        'form-0-group': str(other.pk),
+        'form-0-position': '3',
+        'form-1-primary_id': str(items[1].pk),
+        'form-1-group': str(unchanged.pk),
+        'form-1-position': '0',
+    }, queryset=queryset)
+    assert formset.is_valid(), formset.errors
+    formset.save()
+    assert list(queryset.values_list('group', 'position')) == [
+        (other.pk, 3), (unchanged.pk, 0)]
+    assert (version(group), version(other), version(unchanged)) == (2, 1, 1)
+
+
+@pytest.mark.django_db
+def test_group_without_version(django_assert_num_queries):
+    from django.forms.models import inlineformset_factory
+    from curation.admin import CuratedItemInlineFormSet
+
+    group = models.TagGroup.objects.create(name='Group', slug='slug')
+    tag = models.Tag.objects.create(slug='tag', name='Tag')
+    assert not hasattr(group, 'version')
+    # Saving and deleting items doesn't update the group
+    with django_assert_num_queries(1):
+        item = models.TagItem.objects.create(tag=tag, group=group, position=0)
+    with django_assert_num_queries(1):
+        item.delete()
+
+    FormSet = inlineformset_factory(
+        models.TagGroup, models.TagItem, fields=['tag', 'position'],
+        formset=CuratedItemInlineFormSet, extra=1)
+    assert 'GROUP_VERSION' not in str(FormSet(instance=group).management_form)
+    formset = FormSet({
+        'tagitem_set-TOTAL_FORMS': '1',
+        'tagitem_set-INITIAL_FORMS': '0',
+        'tagitem_set-0-tag': 'tag',
+        'tagitem_set-0-position': '1',
+    }, instance=group)
+    assert formset.is_valid(), formset.errors
+    formset.save()
+    assert list(group.tagitem_set.values_list('position', flat=True)) == [1]
+
+    # Plain groups are saved like any other model
+    group.pk = None
+    group.slug = 'copy'
+    group.save()
+    assert models.TagGroup.objects.count() == 2
+    models.TagGroup.objects.filter(pk=group.pk).delete()
+    group.save()
+    assert models.TagGroup.objects.filter(slug='copy').exists()
+
+    # Groups are cached by version
+    from django.core.exceptions import ImproperlyConfigured
+    from curation.cache import get_group_items
+    with pytest.raises(ImproperlyConfigured):
+        get_group_items(models.TagItem, 'slug')
+
+
+@pytest.mark.django_db
+def test_group_counters(django_assert_num_queries):
+    from django.forms.models import inlineformset_factory
+    from curation.admin import CuratedItemInlineFormSet
+
+    def counters(group):
+        group.refresh_from_db()
+        return (group.item_count, group.max_position, group.next_position)
+
+    group = models.CountedGroup.objects.create(name='Group', slug='slug')
+    other = models.CountedGroup.objects.create(name='Other', slug='other')
+    assert counters(group) == (0, None, 0)
+    targets = [models.ModelB.objects.create(b_field='b%d' % i) for i in range(3)]
+
+    # One INSERT and one UPDATE of the group
+    with django_assert_num_queries(2):
+        models.CountedItem.objects.create(target=targets[0], group=group, position=0)
+    models.CountedItem.objects.create(target=targets[1], group=group, position=1)
+    models.CountedItem.objects.create(target=targets[2], group=group, position=5)
+    assert counters(group) == (3, 5, 6)
+
+    item = models.CountedItem.objects.get(position=5)
+    item.position = 2
+    item.save()
+    assert counters(group) == (3, 2, 3)
+
+    item.group = other
+    item.save()
+    assert counters(group) == (2, 1, 2)
+    assert counters(other) == (1, 2, 3)
+
+    item.delete()
+    assert counters(other) == (0, None, 0)
+
+    FormSet = inlineformset_factory(
+        models.CountedGroup, models.CountedItem, fields=['target', 'position'],
+        formset=CuratedItemInlineFormSet, extra=1, can_delete=True)
+    items = list(group.counteditem_set.all())
+    formset = FormSet({
+        'counteditem_set-TOTAL_FORMS': '3',
+        'counteditem_set-INITIAL_FORMS': '2',
+        'counteditem_set-0-primary_id': str(items[0].pk),
+        'counteditem_set-0-target': str(targets[0].pk),
+        'counteditem_set-0-position': '0',
+        'counteditem_set-0-DELETE': 'on',
+        'counteditem_set-1-primary_id': str(items[1].pk),
+        'counteditem_set-1-target': str(targets[1].pk),
+        'counteditem_set-1-position': '7',
+        'counteditem_set-2-target': str(targets[2].pk),
+        'counteditem_set-2-position': '3',
+    }, instance=models.CountedGroup.objects.get(pk=group.pk))
+    assert formset.is_valid(), formset.errors
+    formset.save()
+    assert counters(group) == (2, 7, 8)
+
+    # Saving a stale instance leaves the counters alone, and a copy starts
+    # from them
+    stale = models.CountedGroup.objects.get(pk=other.pk)
+    models.CountedItem.objects.create(target=targets[0], group=other, position=4)
+    stale.name = 'Renamed'
+    stale.save()
+    assert counters(other) == (1, 4, 5)
+    stale.pk = None
+    stale.slug = 'copy'
+    stale.save()
+    assert counters(stale) == (0, None, 0)
+
+    # Writes that bypass the counters are fixed by a refresh
+    models.CountedItem.objects.filter(group=group).update(position=1)
+    group.refresh_counters()
+    assert (group.item_count, group.max_position) == (2, 1)
+
+
+class ReadRouter(object):
+    """Routes reads of the targets of curated items to 'default', recording them."""
+
+    def __init__(self):
+        self.reads = []
+
+    def db_for_read(self, model, **hints):
+        if model in (models.Post, models.ModelA):
+            self.reads.append((model, hints.get('instance')))
+            return 'default'
+        return None
+
+
+@pytest.mark.django_db
+def test_target_reads_are_routed(settings, django_assert_num_queries):
+    posts = [models.Post.objects.create(title='Post %d' % i) for i in range(3)]
+    a_obj = models.ModelA.objects.create(a_field='a')
+    for i, obj in enumerate(posts + [a_obj]):
+        models.Handler.objects.create(content_object=obj, position=i)
+    ContentType.objects.get_for_models(models.Post, models.ModelA)
+    read_router = ReadRouter()
+    settings.DATABASE_ROUTERS = [read_router]
+
+    handler = models.Handler.objects.get(position=0)
+    assert handler.content_object == posts[0]
+    assert read_router.reads == [(models.Post, handler)]
+
+    # One routing decision, and one query, per content type
+    read_router.reads = []
+    handlers = list(models.Handler.objects.all())
+    with django_assert_num_queries(2):
+        models.Handler._meta.get_field('content_object').cache_related_objects(handlers)
+    assert sorted(model._meta.model_name for model, _ in read_router.reads) == [
+        'modela', 'post']
+    assert [h.content_object for h in handlers] == posts + [a_obj]
+
+    read_router.reads = []
+    ct = ContentType.objects.get_for_model(models.Post)
+    from django.test import RequestFactory
+    response = curation.views.shortcut(RequestFactory().get('/'), ct.pk, posts[1].pk)
+    assert response['Location'].endswith('/posts/%d/' % posts[1].pk)
+    assert read_router.reads == [(models.Post, None)]
+
+
+class OtherDatabaseRouter(object):
+    """Routes reads of posts to the 'other' database."""
+
+    def db_for_read(self, model, **hints):
+        if model is models.Post:
+            return 'other'
+        return None
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'other'])
+def test_targets_on_other_database(settings, django_assert_num_queries):
+    import threading
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+    from curation.generic import clear_target_meta_cache
+
+    posts = [models.Post.objects.using('other').create(title='Post %d' % i) for i in range(2)]
+    a_obj = models.ModelA.objects.create(a_field='a')
+    post_ct = ContentType.objects.get_for_model(models.Post)
+    for i, post in enumerate(posts):
+        models.Handler.objects.create(content_type=post_ct, object_id=post.pk, position=i)
+    models.Handler.objects.create(content_object=a_obj, position=2)
+    # The content type ids of the databases differ
+    ContentType.objects.using('other').filter(pk=post_ct.pk).delete()
+    ContentType.objects.clear_cache()
+    assert ContentType.objects.db_manager('other').get_for_model(models.Post).pk != post_ct.pk
+    settings.DATABASE_ROUTERS = [OtherDatabaseRouter()]
+
+    try:
+        handler = models.Handler.objects.get(position=0)
+        assert handler.content_object == posts[0]
+        assert handler.content_object._state.db == 'other'
+        # The cached post is checked against the content type of the
+        # handler's database
+        with django_assert_num_queries(0, connection=connections['other']):
+            assert handler.title == 'Post 0'
+
+        threads = []
+
+        def record_thread(sender, connection, **kwargs):
+            threads.append((connection.alias, threading.get_ident()))
+
+        settings.CURATION_PARALLEL_TARGET_LOADS = True
+        handlers = list(models.Handler.objects.order_by('position'))
+        connection_created.connect(record_thread)
+        try:
+            models.Handler._meta.get_field('content_object').cache_related_objects(handlers)
+        finally:
+            connection_created.disconnect(record_thread)
+        assert [h.content_object for h in handlers] == posts + [a_obj]
+        assert [h.content_object._state.db for h in handlers] == ['other', 'other', 'default']
+        assert sorted(alias for alias, _ in threads) == ['default', 'other']
+        assert threading.get_ident() not in [ident for _, ident in threads]
+        with django_assert_num_queries(0, connection=connections['other']):
+            assert [h.title for h in handlers[:2]] == ['Post 0', 'Post 1']
+    finally:
+        ContentType.objects.clear_cache()
+        clear_target_meta_cache()
@@ -0,0 +1,249 @@
+import pytest
+
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.contrib import admin
+from django.forms.models import inlineformset_factory, modelformset_factory
+from django.test import RequestFactory
+
+from curation import views
+from curation.admin import (
+    CuratedItemAdmin, CuratedItemInline, CuratedItemInlineFormSet, CuratedItemModelFormSet)
+
+from tests import models
+from tests.query_budget import query_budget
+
+
+SIZES = [1, 5, 20]
+
+
+@pytest.fixture
+def staff_request():
+    def make_request(data=None):
+        request = RequestFactory().get('/', data)
+        request.user = User(username='staff', is_active=True, is_staff=True)
+        return request
+    return make_request
+
+
+def make_group(n):
+    group = models.CuratedPostGroup.objects.create(name='Group', slug='slug')
+    for i in range(n):
+        post = models.Post.objects.create(title='Post %d' % i)
+        models.CuratedPostItem.objects.create(post=post, group=group, position=i)
+    return group
+
+
+def make_handlers(n):
+    for i in range(n):
+        model, kwargs = [
+            (models.Post, {'title': 'Post %d' % i}),
+            (models.ModelA, {'a_field': 'a%d' % i}),
+            (models.ModelB, {'b_field': 'b%d' % i}),
+        ][i % 3]
+        models.Handler.objects.create(
+            content_object=model.objects.create(**kwargs), position=i)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('n', SIZES)
+def test_load_group(n):
+    make_group(n)
+    with query_budget('load_group', n):
+        assert len(models.CuratedPostItem.objects.group('slug')) == n
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('n', SIZES)
+def test_proxied_access(n):
+    make_group(n)
+    make_handlers(n)
+    ContentType.objects.clear_cache()
+    # Populate the ContentType cache
+    list(ContentType.objects.get_for_models(models.Post, models.ModelA, models.ModelB))
+
+    with query_budget('proxied_access_select_related', n):
+        for item in models.CuratedPostItem.objects.group('slug').select_related('post'):
+            item.title
+    with query_budget('proxied_access_prefetch', n):
+        for handler in models.Handler.objects.prefetch_related('content_object'):
+            handler.content_object
+            getattr(handler, 'title', None)
+    with query_budget('proxied_access_lazy', n):
+        for handler in models.Handler.objects.all():
+            getattr(handler, 'title', None)
+            getattr(handler, 'a_field', None)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('n', SIZES)
+def test_related_lookup(n, staff_request):
+    make_handlers(n)
+    handler_ct = ContentType.objects.get_for_model(models.Handler)
+    for handler in models.Handler.objects.all():
+        request = staff_request({
+            'app_label': handler.content_type.app_label,
+            'model_name': handler.content_type.model,
+            'object_id': handler.object_id,
+            'ct_field': 'content_type',
+            'fk_field': 'object_id',
+            'ct_id': handler_ct.pk,
+        })
+        with query_budget('related_lookup', n):
+            response = views.related_lookup(request)
+        assert response.status_code == 200
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('n', SIZES)
+def test_get_content_types(n, staff_request):
+    make_handlers(n)
+    with query_budget('get_content_types', n):
+        for i in range(n):
+            assert views.get_content_types(staff_request()).status_code == 200
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('n', SIZES)
+def test_shortcut(n, staff_request):
+    make_group(n)
+    post_ct = ContentType.objects.get_for_model(models.Post)
+    for post in models.Post.objects.all():
+        with query_budget('shortcut', n):
+            response = views.shortcut(staff_request(), post_ct.pk, post.pk)
+        assert response.status_code == 302
+        assert response['Location'].endswith(post.get_absolute_url())
+
+
+class PostItemInline(CuratedItemInline):
+    model = models.CuratedPostItem
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('n', SIZES)
+def test_admin_inline(n):
+    group = make_group(n)
+    FormSet = inlineformset_factory(
+        models.CuratedPostGroup, models.CuratedPostItem, fields=['post', 'position'],
+        formset=CuratedItemInlineFormSet, extra=1)
+    inline = PostItemInline(models.CuratedPostGroup, admin.site)
+    request = RequestFactory().get('/')
+    request.user = User(username='admin', is_active=True, is_superuser=True)
+    with query_budget('admin_inline', n):
+        formset = FormSet(instance=group, queryset=inline.get_queryset(request))
+        html = str(formset) + str(formset.empty_form)
+    # The post select of each item form, the extra form and the empty form
+    assert html.count('>[Post(%d)]</option>' % group.curatedpostitem_set.last().post_id) == n + 2
+    widgets = [form.fields['post'].widget for form in formset.forms + [formset.empty_form]]
+    assert len(set(id(getattr(w, 'widget', w).choices) for w in widgets)) == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('n', SIZES)
+def test_admin_generic_formset(n):
+    make_handlers(n)
+    ContentType.objects.clear_cache()
+    list(ContentType.objects.get_for_models(models.Post, models.ModelA, models.ModelB))
+    FormSet = modelformset_factory(
+        models.Handler, exclude=['source'], extra=1, formset=CuratedItemModelFormSet)
+    with query_budget('admin_generic_formset', n):
+        formset = FormSet(queryset=models.Handler.objects.all())
+        html = str(formset) + str(formset.empty_form)
+    assert html.count('data-field-name="url"') == n + 2
+    # The forms share the content type choices rather than copies of them
+    fields = [form.fields['content_type'] for form in formset.forms + [formset.empty_form]]
+    assert len(set(id(field.choices) for field in fields)) == 1
+    assert len(set(id(field.widget.choices) for field in fields)) == 1
+    assert fields[0].widget.choices is fields[0].choices
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('n', SIZES)
+def test_admin_queryset(n):
+    make_handlers(n)
+    ContentType.objects.clear_cache()
+    list(ContentType.objects.get_for_models(models.Post, models.ModelA, models.ModelB))
+    model_admin = CuratedItemAdmin(models.Handler, admin.site)
+    request = RequestFactory().get('/')
+    with query_budget('admin_queryset', n):
+        for handler in model_admin.get_queryset(request):
+            str(handler.content_object)
+            handler.content_type
+
+
+def formset_data(handlers, **overrides):
+    data = {
+        'form-TOTAL_FORMS': str(len(handlers)),
+        'form-INITIAL_FORMS': str(len(handlers)),
+    }
+    for i, handler in enumerate(handlers):
+        data.update({
+            'form-%d-primary_id' % i: str(handler.pk),
+            'form-%d-content_type' % i: str(handler.content_type_id),
+            'form-%d-object_id' % i: str(handler.object_id),
+            'form-%d-position' % i: str(overrides.get('position', {}).get(i, handler.position)),
+            'form-%d-custom_title' % i: '',
+            'form-%d-url' % i: '',
+        })
+    return data
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('n', SIZES)
+def test_formset_validation(n):
+    make_handlers(n)
+    FormSet = modelformset_factory(models.Handler, exclude=['source'], extra=0)
+    handlers = list(models.Handler.objects.all())
+    with query_budget('formset_validation', n):
+        formset = FormSet(formset_data(handlers), queryset=models.Handler.objects.all())
+        assert formset.is_valid(), formset.errors
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('n', SIZES)
+def test_save_reordered_group(n):
+    make_handlers(n)
+    FormSet = modelformset_factory(
+        models.Handler, exclude=['source'], extra=0, formset=CuratedItemModelFormSet)
+    handlers = list(models.Handler.objects.all())
+    reordered = {i: n - i for i in range(n)}
+    formset = FormSet(formset_data(handlers, position=reordered),
+                      queryset=models.Handler.objects.all())
+    assert formset.is_valid(), formset.errors
+    with query_budget('save_reordered_group', n):
+        formset.save()
+    assert [h.position for h in models.Handler.objects.order_by('pk')] == [
+        n - i for i in range(n)]
+
+
+@pytest.mark.django_db
+def test_save_changed_group():
+    make_handlers(4)
+    a_obj = models.ModelA.objects.create(a_field='new')
+    FormSet = modelformset_factory(
+        models.Handler, exclude=['source'], extra=1, can_delete=True,
+        formset=CuratedItemModelFormSet)
+    handlers = list(models.Handler.objects.all())
+    data = formset_data(handlers)
+    data.update({
+        'form-TOTAL_FORMS': '5',
+        'form-0-DELETE': 'on',
+        'form-1-content_type': str(ContentType.objects.get_for_model(models.ModelA).pk),
+        'form-1-object_id': str(a_obj.pk),
+        'form-2-custom_title': 'Custom',
+        'form-4-content_type': str(ContentType.objects.get_for_model(models.Post).pk),
+        'form-4-object_id': str(handlers[0].object_id),
+        'form-4-position': '5',
+    })
+    formset = FormSet(data, queryset=models.Handler.objects.all())
+    assert formset.is_valid(), formset.errors
+    formset.save()
+    assert [obj.pk for obj in formset.deleted_objects] == [handlers[0].pk]
+    assert [obj.pk for obj, _ in formset.changed_objects] == [handlers[1].pk, handlers[2].pk]
+    assert len(formset.new_objects) == 1
+
+    handler = models.Handler.objects.get(pk=handlers[1].pk)
+    assert (handler.source, handler.a_field) == ('moda', 'new')
+    assert models.Handler.objects.get(pk=handlers[2].pk).title == 'Custom'
+    assert models.Handler.objects.filter(position=5, source='post').exists()
+    assert models.Handler.objects.count() == 4